@@ -77,6 +77,40 @@ def get_parser(subparser=None, subcommand_name="unwrap") -> argparse.ArgumentPar
             " unwrap faster."
         ),
     )
+    # SNAPHU tiling options
+    tiling = parser.add_argument_group("SNAPHU tiling options")
+    tiling.add_argument(
+        "--ntiles",
+        type=int,
+        nargs=2,
+        default=(1, 1),
+        metavar=("ROW_TILES", "COL_TILES"),
+        help="Split the interferograms into this many (row, column) tiles.",
+    )
+    tiling.add_argument(
+        "--auto-tiles",
+        dest="ntiles",
+        action="store_const",
+        const="auto",
+        help="Choose the number of tiles from the interferogram size.",
+    )
+    tiling.add_argument(
+        "--tile-overlap",
+        type=int,
+        nargs=2,
+        default=(0, 0),
+        metavar=("ROW_OVERLAP", "COL_OVERLAP"),
+        help="Number of pixels of overlap between tiles in (row, column).",
+    )
+    tiling.add_argument(
+        "--n-parallel-tiles",
+        type=int,
+        default=None,
+        help=(
+            "Maximum number of tiles to unwrap in parallel for each interferogram."
+            " Default uses the CPUs not taken by `--max-jobs`."
+        ),
+    )
     parser.set_defaults(run_func=_run_unwrap)
 
     return parser
@@ -1,6 +1,7 @@
 """Combine estimated DS phases with PS phases to form interferograms."""
 from __future__ import annotations
 
+import datetime
 import itertools
 from os import fspath
 from pathlib import Path
@@ -25,6 +26,22 @@ gdal.UseExceptions()
 
 logger = get_log(__name__)
 
+_VRT_TEMPLATE = """\
+<VRTDataset rasterXSize="{xsize}" rasterYSize="{ysize}">
+{bands}</VRTDataset>
+"""
+_BAND_TEMPLATE = """\
+    <VRTRasterBand dataType="CFloat32" band="{band}" subClass="VRTDerivedRasterBand">
+        <PixelFunctionType>{pixel_function}</PixelFunctionType>
+        <SimpleSource>
+            <SourceFilename relativeToVRT="0">{ref_slc}</SourceFilename>
+        </SimpleSource>
+        <SimpleSource>
+            <SourceFilename relativeToVRT="0">{sec_slc}</SourceFilename>
+        </SimpleSource>
+    </VRTRasterBand>
+"""
+
 
 class VRTInterferogram(BaseModel, extra="allow"):
     """Create an interferogram using a VRTDerivedRasterBand.
@@ -88,19 +105,6 @@ class VRTInterferogram(BaseModel, extra="allow"):
     write: bool = Field(True, description="Write the VRT file to disk")
 
     pixel_function: Literal["cmul", "mul"] = "cmul"
-    _template = """\
-<VRTDataset rasterXSize="{xsize}" rasterYSize="{ysize}">
-    <VRTRasterBand dataType="CFloat32" band="1" subClass="VRTDerivedRasterBand">
-        <PixelFunctionType>{pixel_function}</PixelFunctionType>
-        <SimpleSource>
-            <SourceFilename relativeToVRT="0">{ref_slc}</SourceFilename>
-        </SimpleSource>
-        <SimpleSource>
-            <SourceFilename relativeToVRT="0">{sec_slc}</SourceFilename>
-        </SimpleSource>
-    </VRTRasterBand>
-</VRTDataset>
-    """
 
     @field_validator("ref_slc", "sec_slc")
     @classmethod
@@ -108,21 +112,10 @@ class VRTInterferogram(BaseModel, extra="allow"):
         subdataset = info.data.get("subdataset")
         # If we're using a subdataset, create a the GDAL-readable string
         gdal_str = io.format_nc_filename(v, subdataset)
-        try:
-            # First make sure it's openable
-            gdal.Info(fspath(gdal_str))
-        except RuntimeError:
+        # First make sure it's openable
+        if not _probe(gdal_str)[3]:
             raise ValueError(f"File {gdal_str} is not a valid GDAL dataset")
-        # Then, if we passed a string like 'NETCDF:"file.nc":band', make sure
-        # the file is absolute
-        if ":" in str(gdal_str):
-            try:
-                gdal_str = str(utils._resolve_gdal_path(gdal_str))
-            except Exception:
-                # if the file had colons for some reason but
-                # it didn't match, just ignore
-                pass
-        return gdal_str
+        return _resolve_gdal_str(gdal_str)
 
     @field_validator("outdir")
     @classmethod
@@ -164,16 +157,12 @@ class VRTInterferogram(BaseModel, extra="allow"):
         if not ref_slc or not sec_slc:
             # Skip validation if files are not set
             return self
-        ds1 = gdal.Open(fspath(ref_slc))
-        ds2 = gdal.Open(fspath(sec_slc))
-        xsize, ysize = ds1.RasterXSize, ds1.RasterYSize
-        xsize2, ysize2 = ds2.RasterXSize, ds2.RasterYSize
+        xsize, ysize, gt1, _ = _probe(ref_slc)
+        xsize2, ysize2, gt2, _ = _probe(sec_slc)
         if xsize != xsize2 or ysize != ysize2:
             raise ValueError(
                 f"Input files {ref_slc} and {sec_slc} are not the same size"
             )
-        gt1 = ds1.GetGeoTransform()
-        gt2 = ds2.GetGeoTransform()
         if gt1 != gt2:
             raise ValueError(
                 f"Input files {ref_slc} and {sec_slc} have different GeoTransforms"
@@ -190,20 +179,86 @@ class VRTInterferogram(BaseModel, extra="allow"):
         if self.write:
             self._write_vrt()
 
+    @classmethod
+    def build_fast(
+        cls,
+        ref_slc: Filename,
+        sec_slc: Filename,
+        outdir: Filename,
+        write: bool = True,
+        date_format: str = "%Y%m%d",
+        dates: Optional[tuple[datetime.date, datetime.date]] = None,
+    ) -> "VRTInterferogram":
+        """Create a VRTInterferogram from already-validated SLCs.
+
+        Skips the pydantic validation, which re-checks the same inputs for
+        every pair when many interferograms are formed from one SLC stack.
+        The caller is responsible for checking that `ref_slc` and `sec_slc`
+        are readable, matching GDAL strings (see `Network`).
+
+        Parameters
+        ----------
+        ref_slc : Filename
+            GDAL-readable path to the reference SLC.
+        sec_slc : Filename
+            GDAL-readable path to the secondary SLC.
+        outdir : Filename
+            Directory to place the output interferogram.
+        write : bool, optional
+            Write the VRT file to disk. Defaults to True.
+        date_format : str, optional
+            Date format to use when parsing dates from the input files.
+            Defaults to '%Y%m%d'.
+        dates : tuple[datetime.date, datetime.date], optional
+            Already-parsed (reference, secondary) dates.
+            If not provided, they are parsed from the filenames.
+
+        Returns
+        -------
+        VRTInterferogram
+        """
+        if dates is None:
+            dates = (
+                utils.get_dates(ref_slc, fmt=date_format)[0],
+                utils.get_dates(sec_slc, fmt=date_format)[0],
+            )
+        date1, date2 = dates
+        path = Path(outdir) / (io._format_date_pair(date1, date2, date_format) + ".vrt")
+        # If we're writing, any existing file is overwritten, so skip the extra
+        # stat (and the race between checking and removing)
+        if not write and path.exists():
+            logger.info(f"Removing {path}")
+            path.unlink()
+        ifg = cls.model_construct(
+            ref_slc=ref_slc,
+            sec_slc=sec_slc,
+            outdir=Path(outdir),
+            path=path,
+            date_format=date_format,
+            write=write,
+            dates=(date1, date2),
+        )
+        if write:
+            ifg._write_vrt()
+        return ifg
+
     def _write_vrt(self):
-        xsize, ysize = io.get_raster_xysize(self.ref_slc)
+        xsize, ysize, _, _ = _probe(self.ref_slc)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.path, "w") as f:
-            f.write(
-                self._template.format(
-                    xsize=xsize,
-                    ysize=ysize,
-                    ref_slc=self.ref_slc,
-                    sec_slc=self.sec_slc,
-                    pixel_function=self.pixel_function,
-                )
+        self.path.write_text(
+            _VRT_TEMPLATE.format(
+                xsize=xsize, ysize=ysize, bands=self._band_xml(band=1)
             )
-        io.copy_projection(self.ref_slc, self.path)
+        )
+        _copy_slc_projection(self.ref_slc, self.path)
+
+    def _band_xml(self, band: int) -> str:
+        return _BAND_TEMPLATE.format(
+            band=band,
+            ref_slc=self.ref_slc,
+            sec_slc=self.sec_slc,
+            pixel_function=self.pixel_function,
+        )
 
     def load(self):
         """Load the interferogram as a numpy array."""
@@ -348,12 +403,76 @@ class Network:
         """
         if outdir is None:
             outdir = Path(self.slc_list[0]).parent
+        # Validate each unique SLC once, rather than once per interferogram
+        gdal_file_strings = self._gdal_file_strings
+        resolved: dict[Filename, Filename] = {}
+        for gdal_str in itertools.chain.from_iterable(gdal_file_strings):
+            if gdal_str in resolved:
+                continue
+            if not _probe(gdal_str)[3]:
+                raise ValueError(f"File {gdal_str} is not a valid GDAL dataset")
+            resolved[gdal_str] = _resolve_gdal_str(gdal_str)
+
+        # Reuse the dates parsed while sorting the SLCs
+        slc_to_date = dict(zip(self.slc_list, self.slc_dates))
         ifg_list: list[VRTInterferogram] = []
-        for ref, sec in self._gdal_file_strings:
-            v = VRTInterferogram(ref_slc=ref, sec_slc=sec, outdir=outdir, write=write)
+        for (slc1, slc2), (ref, sec) in zip(self.slc_file_pairs, gdal_file_strings):
+            xsize, ysize, gt1, _ = _probe(ref)
+            xsize2, ysize2, gt2, _ = _probe(sec)
+            if (xsize, ysize) != (xsize2, ysize2):
+                raise ValueError(f"Input files {ref} and {sec} are not the same size")
+            if gt1 != gt2:
+                raise ValueError(
+                    f"Input files {ref} and {sec} have different GeoTransforms"
+                )
+            v = VRTInterferogram.build_fast(
+                resolved[ref],
+                resolved[sec],
+                outdir=outdir,
+                write=write,
+                dates=(slc_to_date[slc1], slc_to_date[slc2]),
+            )
             ifg_list.append(v)
         return ifg_list
 
+    def to_single_vrt(self, path: Filename) -> Path:
+        """Write all interferograms as bands of one multi-band VRT file.
+
+        Band `k` (1-indexed) of the output is `self.ifg_list[k - 1]`.
+
+        Parameters
+        ----------
+        path : Filename
+            Path to the output VRT file.
+
+        Returns
+        -------
+        Path
+            Path to the written VRT file.
+
+        Raises
+        ------
+        ValueError
+            If the network has no interferograms.
+        """
+        if not self.ifg_list:
+            raise ValueError("No interferograms in network to write")
+        path = Path(path)
+        first_slc = self.ifg_list[0].ref_slc
+        xsize, ysize, _, _ = _probe(first_slc)
+        bands = "".join(
+            ifg._band_xml(band=k) for k, ifg in enumerate(self.ifg_list, start=1)
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_VRT_TEMPLATE.format(xsize=xsize, ysize=ysize, bands=bands))
+        _copy_slc_projection(first_slc, path)
+
+        ds = gdal.Open(fspath(path), gdal.GA_Update)
+        for k, ifg in enumerate(self.ifg_list, start=1):
+            ds.GetRasterBand(k).SetDescription(ifg.path.stem)
+        ds = None
+        return path
+
     @property
     def _gdal_file_strings(self):
         # format each file in each pair
@@ -433,11 +552,13 @@ class Network:
         list
             Pairs of (date1, date2) ifgs
         """
-        slc_to_idx = {s: idx for idx, s in enumerate(slc_file_list)}
+        slc_file_list = list(slc_file_list)
+        n = len(slc_file_list)
+        # Only generate the pairs within `max_bandwidth` instead of filtering all
         return [
-            (a, b)
-            for (a, b) in Network._all_pairs(slc_file_list)
-            if slc_to_idx[b] - slc_to_idx[a] <= max_bandwidth
+            (slc_file_list[i], slc_file_list[j])
+            for i in range(n)
+            for j in range(i + 1, min(i + 1 + max_bandwidth, n))
         ]
 
     @staticmethod
@@ -465,7 +586,7 @@ class Network:
         ValueError
             If any of the input files have more than one date.
         """
-        ifg_strs = Network._all_pairs(slc_file_list)
+        slc_file_list = list(slc_file_list)
         slc_date_lists = [utils.get_dates(f) for f in slc_file_list]
         # Check we've got all single-date files
         if any(len(d) != 1 for d in slc_date_lists):
@@ -474,20 +595,22 @@ class Network:
             )
         slc_dates = [d[0] for d in slc_date_lists]
 
-        ifg_dates = Network._all_pairs(slc_dates)
-        baselines = [Network._temp_baseline(ifg) for ifg in ifg_dates]
+        # Compute all (upper triangular) baselines at once, in days
+        dates = np.array(slc_dates, dtype="datetime64[D]")
+        di, dj = np.triu_indices(len(dates), k=1)
+        baselines = (dates[dj] - dates[di]).astype(np.int64)
+        keep = np.flatnonzero(baselines <= max_temporal_baseline)
+        if keep.size == 0:
+            return []
         return [
-            ifg for ifg, b in zip(ifg_strs, baselines) if b <= max_temporal_baseline
+            (slc_file_list[i], slc_file_list[j])
+            for i, j in zip(di[keep].tolist(), dj[keep].tolist())
         ]
 
     @staticmethod
     def _all_pairs(slclist):
-        """Create the list of all possible ifg pairs from slclist."""
-        return list(itertools.combinations(slclist, 2))
-
-    @staticmethod
-    def _temp_baseline(ifg_pair):
-        return (ifg_pair[1] - ifg_pair[0]).days
+        """Iterate over all possible ifg pairs from slclist."""
+        return itertools.combinations(slclist, 2)
 
     def __len__(self):
         return len(self.ifg_list)
@@ -505,6 +628,53 @@ class Network:
         return self.ifg_list == other.ifg_list
 
 
+def _copy_slc_projection(src: Filename, dst: Filename) -> None:
+    """Same as `io.copy_projection`, but without re-opening `src` every time."""
+    projection, geotransform, nodata = _cached_projection(src)
+    ds = gdal.Open(fspath(dst), gdal.GA_Update)
+    if geotransform != (0, 1, 0, 0, 0, 1):
+        ds.SetGeoTransform(geotransform)
+    if projection:
+        ds.SetProjection(projection)
+    if nodata is not None:
+        for k in range(1, ds.RasterCount + 1):
+            ds.GetRasterBand(k).SetNoDataValue(nodata)
+    ds = None
+
+
+def _resolve_gdal_str(gdal_str: Filename) -> Filename:
+    """Make the file portion of a string like 'NETCDF:"file.nc":band' absolute."""
+    if ":" in str(gdal_str):
+        try:
+            return str(utils._resolve_gdal_path(gdal_str))
+        except Exception:
+            # if the file had colons for some reason but
+            # it didn't match, just ignore
+            pass
+    return gdal_str
+
+
+def _probe(gdal_str: Filename) -> tuple[int, int, tuple[float, ...], bool]:
+    """Get the (xsize, ysize, geotransform, is_valid) of a GDAL-readable file.
+
+    Uses the `io` metadata cache, so each SLC in a `Network` is only opened
+    once, no matter how many interferograms use it.
+    """
+    try:
+        info = io._raster_info(gdal_str)
+    except RuntimeError:
+        return 0, 0, (), False
+    return info.xsize, info.ysize, info.geotransform, True
+
+
+def _cached_projection(
+    src: Filename,
+) -> tuple[str, tuple[float, ...], Optional[float]]:
+    """Get the (projection, geotransform, nodata) of `src`, cached like `_probe`."""
+    info = io._raster_info(src)
+    return info.projection, info.geotransform, info.nodata[0]
+
+
 def estimate_correlation_from_phase(
     ifg: Union[VRTInterferogram, ArrayLike], window_size: Union[int, tuple[int, int]]
 ) -> np.ndarray:
@@ -6,15 +6,23 @@ wrapper functions to write/iterate over blocks of large raster files.
 from __future__ import annotations
 
 import math
-from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date
+from functools import lru_cache
 from os import fspath
 from pathlib import Path
-from typing import Any, Generator, Optional, Sequence, Union
+from typing import Any, Generator, Iterator, NamedTuple, Optional, Sequence, Union
 
 import h5py
 import numpy as np
+from numba import njit
 from numpy.typing import ArrayLike, DTypeLike
 from osgeo import gdal
 from pyproj import CRS
@@ -52,6 +60,8 @@ DEFAULT_HDF5_OPTIONS = dict(
     shuffle=True,
 )
 DEFAULT_DATETIME_FORMAT = "%Y%m%d"
+# Size of the HDF5 chunk cache used by `Writer` for each open file
+_H5_CHUNK_CACHE_BYTES = 64 * 1024**2
 
 logger = get_log(__name__)
 
@@ -90,7 +100,10 @@ def load_gdal(
         Array of shape (bands, y, x) or (y, x) if `band` is specified,
         where y = height // subsample_factor and x = width // subsample_factor.
     """
-    ds = gdal.Open(fspath(filename))
+    # GTiff reads `GDAL_NUM_THREADS` when the dataset is opened, which lets
+    # the tiles/strips of compressed files be decoded by multiple threads
+    with _gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+        ds = gdal.Open(fspath(filename))
     nrows, ncols = ds.RasterYSize, ds.RasterXSize
 
     # if rows or cols are not specified, load all rows/cols
@@ -119,27 +132,118 @@ def load_gdal(
         xsize // subsample_factor[1],
     )
 
-    # Read the data, and decimate if specified
-    resamp = gdal.GRA_NearestNeighbour
-    if band is None:
-        count = ds.RasterCount
-        out = np.empty((count, nrows_out, ncols_out), dtype=dt)
-        ds.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=out, resample_alg=resamp)
-        if count == 1:
-            out = out[0]
+    if subsample_factor == (1, 1):
+        # Raw, uncompressed files are copied straight out of a memory map,
+        # skipping GDAL's block cache
+        out = _memmap_envi(ds, dt, band, slice(yoff, row_stop), slice(xoff, col_stop))
+        if out is None:
+            # No resampling needed: let GDAL allocate the output array itself
+            src = ds if band is None else ds.GetRasterBand(band)
+            out = src.ReadAsArray(xoff, yoff, xsize, ysize)
     else:
-        out = np.empty((nrows_out, ncols_out), dtype=dt)
-        bnd = ds.GetRasterBand(band)
-        bnd.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=out, resample_alg=resamp)
+        # Read the data, and decimate
+        resamp = gdal.GRA_NearestNeighbour
+        if band is None:
+            count = ds.RasterCount
+            out = np.empty((count, nrows_out, ncols_out), dtype=dt)
+            ds.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=out, resample_alg=resamp)
+            if count == 1:
+                out = out[0]
+        else:
+            out = np.empty((nrows_out, ncols_out), dtype=dt)
+            bnd = ds.GetRasterBand(band)
+            bnd.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=out, resample_alg=resamp)
 
     if not masked:
         return out
     # Get the nodata value
     nd = get_raster_nodata(filename)
+    # `out` is not used elsewhere, so the masked array can share its memory
     if nd is not None and np.isnan(nd):
-        return np.ma.masked_invalid(out)
+        return np.ma.masked_invalid(out, copy=False)
+    else:
+        return np.ma.masked_equal(out, nd, copy=False)
+
+
+# Order of the axes on disk for each ENVI interleave
+_ENVI_AXES = {
+    "bsq": ("band", "row", "col"),
+    "bil": ("row", "band", "col"),
+    "bip": ("row", "col", "band"),
+}
+
+
+def _memmap_envi(
+    ds: gdal.Dataset,
+    dtype: np.dtype,
+    band: Optional[int],
+    rows: slice,
+    cols: slice,
+) -> Optional[np.ndarray]:
+    """Read a raw ENVI file through a memory map, if its layout allows it.
+
+    Files in native byte order are mapped, and the requested rows/cols/bands are
+    copied into a new, C-contiguous `np.ndarray` of the same shape as the one
+    GDAL would return. The copy doesn't depend on the file (or its mapping)
+    afterwards, so it can be pickled, or kept after the file is overwritten.
+    Returns None if the file can't be mapped, so the caller can use GDAL.
+    """
+    if ds.GetDriver().ShortName != "ENVI":
+        return None
+    data_file, *other_files = ds.GetFileList()
+    hdr_files = [f for f in other_files if f.lower().endswith(".hdr")]
+    if not hdr_files:
+        return None
+    header = Path(hdr_files[0]).read_text(errors="ignore")
+
+    def _get_value(key: str) -> Optional[str]:
+        match = re.search(rf"^\s*{key}\s*=\s*(\w+)", header, re.MULTILINE | re.I)
+        return match.group(1) if match else None
+
+    interleave = (_get_value("interleave") or "").lower()
+    native_order = "0" if sys.byteorder == "little" else "1"
+    if interleave not in _ENVI_AXES or _get_value("byte order") != native_order:
+        return None
+    # e.g. CInt16 has no numpy equivalent, and is loaded by GDAL as complex64
+    if dtype.itemsize != gdal.GetDataTypeSize(ds.GetRasterBand(1).DataType) // 8:
+        return None
+
+    offset = int(_get_value("header offset") or 0)
+    count, nrows, ncols = ds.RasterCount, ds.RasterYSize, ds.RasterXSize
+    sizes = {"band": count, "row": nrows, "col": ncols}
+    shape = tuple(sizes[axis] for axis in _ENVI_AXES[interleave])
+    if Path(data_file).stat().st_size < offset + math.prod(shape) * dtype.itemsize:
+        return None
+    mm = np.memmap(data_file, dtype=dtype, mode="r", offset=offset, shape=shape)
+    # Reorder the on-disk axes to (band, row, col)
+    mm = mm.transpose([_ENVI_AXES[interleave].index(a) for a in ("band", "row", "col")])
+    if band is not None:
+        view = mm[band - 1, rows, cols]
+    elif count == 1:
+        view = mm[0, rows, cols]
     else:
-        return np.ma.masked_equal(out, nd)
+        view = mm[:, rows, cols]
+    # Always copy (`np.array` drops the memmap subclass, and with it the mapping)
+    out = np.array(view, order="C")
+    del view, mm
+    return out
+
+
+@contextmanager
+def _gdal_config_option(key: str, value: str) -> Iterator[None]:
+    """Temporarily set a GDAL configuration option for the current thread.
+
+    If the user has already set `key` (through the environment or
+    `gdal.SetConfigOption`), their value is left in place.
+    """
+    if gdal.GetConfigOption(key) is not None:
+        yield
+        return
+    gdal.SetThreadLocalConfigOption(key, value)
+    try:
+        yield
+    finally:
+        gdal.SetThreadLocalConfigOption(key, None)
 
 
 def format_nc_filename(filename: Filename, ds_name: Optional[str] = None) -> str:
@@ -181,8 +285,7 @@ def format_nc_filename(filename: Filename, ds_name: Optional[str] = None) -> str
 
 def _assert_images_same_size(files):
     """Ensure all files are the same size."""
-    with ThreadPoolExecutor(5) as executor:
-        sizes = list(executor.map(get_raster_xysize, files))
+    sizes = list(map(get_raster_xysize, files))
     if len(set(sizes)) > 1:
         raise ValueError(f"Not files have same raster (x, y) size:\n{set(sizes)}")
 
@@ -209,14 +312,94 @@ def copy_projection(src_file: Filename, dst_file: Filename) -> None:
         ds_dst.GetRasterBand(1).SetNoDataValue(nodata)
 
     ds_src = ds_dst = None
+    _clear_raster_info(dst_file)
+
+
+class _RasterInfo(NamedTuple):
+    """Metadata of a raster, read with a single `gdal.Open`."""
+
+    xsize: int
+    ysize: int
+    count: int
+    dtype: Optional[np.dtype]
+    gdal_dtype: Optional[int]
+    nodata: tuple[Optional[float], ...]
+    geotransform: tuple[float, ...]
+    projection: str
+    driver: str
+    block_size: Optional[list[int]]
+    same_block_sizes: bool
+
+
+# Maps filename -> (files read by GDAL, (mtime, size) of those files, info)
+_RASTER_INFO_CACHE: dict[str, tuple[list[str], tuple, _RasterInfo]] = {}
+_RASTER_INFO_CACHE_SIZE = 512
+_RASTER_INFO_LOCK = threading.Lock()
+
+
+def _raster_info(filename: Filename) -> _RasterInfo:
+    """Get the metadata of `filename`, opening it only if the files changed.
+
+    Entries are checked against the modification time/size of every file
+    GDAL uses for the dataset (e.g. ENVI .hdr sidecars, VRT sources), so
+    repeated metadata lookups cost a few `stat` calls instead of an open.
+    """
+    key = fspath(filename)
+    cached = _RASTER_INFO_CACHE.get(key)
+    if cached is not None:
+        file_list, stamps, info = cached
+        if _get_file_stamps(file_list) == stamps:
+            return info
+
+    ds = gdal.Open(key)
+    bands = [ds.GetRasterBand(i) for i in range(1, ds.RasterCount + 1)]
+    block_sizes = [b.GetBlockSize() for b in bands]
+    info = _RasterInfo(
+        xsize=ds.RasterXSize,
+        ysize=ds.RasterYSize,
+        count=ds.RasterCount,
+        dtype=gdal_to_numpy_type(bands[0].DataType) if bands else None,
+        gdal_dtype=bands[0].DataType if bands else None,
+        nodata=tuple(b.GetNoDataValue() for b in bands),
+        geotransform=tuple(ds.GetGeoTransform()),
+        projection=ds.GetProjection(),
+        driver=ds.GetDriver().ShortName,
+        block_size=block_sizes[0] if bands else None,
+        same_block_sizes=all(bs == block_sizes[0] for bs in block_sizes),
+    )
+    file_list = ds.GetFileList() or []
+    ds = None
+
+    stamps = _get_file_stamps(file_list)
+    # Only cache things we can check for changes (e.g. not /vsimem/ files)
+    if file_list and stamps is not None:
+        with _RASTER_INFO_LOCK:
+            if len(_RASTER_INFO_CACHE) >= _RASTER_INFO_CACHE_SIZE:
+                # Drop the oldest entry
+                _RASTER_INFO_CACHE.pop(next(iter(_RASTER_INFO_CACHE)))
+            _RASTER_INFO_CACHE[key] = (file_list, stamps, info)
+    return info
+
+
+def _get_file_stamps(file_list: Sequence[str]) -> Optional[tuple]:
+    try:
+        return tuple(
+            (st.st_mtime_ns, st.st_size) for st in (os.stat(f) for f in file_list)
+        )
+    except OSError:
+        return None
+
+
+def _clear_raster_info(filename: Filename) -> None:
+    """Drop `filename` from the metadata cache after modifying it."""
+    with _RASTER_INFO_LOCK:
+        _RASTER_INFO_CACHE.pop(fspath(filename), None)
 
 
 def get_raster_xysize(filename: Filename) -> tuple[int, int]:
     """Get the xsize/ysize of a GDAL-readable raster."""
-    ds = gdal.Open(fspath(filename))
-    xsize, ysize = ds.RasterXSize, ds.RasterYSize
-    ds = None
-    return xsize, ysize
+    info = _raster_info(filename)
+    return info.xsize, info.ysize
 
 
 def get_raster_nodata(filename: Filename, band: int = 1) -> Optional[float]:
@@ -234,9 +417,7 @@ def get_raster_nodata(filename: Filename, band: int = 1) -> Optional[float]:
     Optional[float]
         Nodata value, or None if not found.
     """
-    ds = gdal.Open(fspath(filename))
-    nodata = ds.GetRasterBand(band).GetNoDataValue()
-    return nodata
+    return _raster_info(filename).nodata[band - 1]
 
 
 def get_raster_crs(filename: Filename) -> CRS:
@@ -252,9 +433,7 @@ def get_raster_crs(filename: Filename) -> CRS:
     CRS
         CRS.
     """
-    ds = gdal.Open(fspath(filename))
-    crs = CRS.from_wkt(ds.GetProjection())
-    return crs
+    return CRS.from_wkt(_raster_info(filename).projection)
 
 
 def get_raster_gt(filename: Filename) -> list[float]:
@@ -270,9 +449,7 @@ def get_raster_gt(filename: Filename) -> list[float]:
     List[float]
         6 floats representing a GDAL Geotransform.
     """
-    ds = gdal.Open(fspath(filename))
-    gt = ds.GetGeoTransform()
-    return gt
+    return _raster_info(filename).geotransform
 
 
 def get_raster_dtype(filename: Filename) -> np.dtype:
@@ -288,9 +465,7 @@ def get_raster_dtype(filename: Filename) -> np.dtype:
     np.dtype
         Data type.
     """
-    ds = gdal.Open(fspath(filename))
-    dt = gdal_to_numpy_type(ds.GetRasterBand(1).DataType)
-    return dt
+    return _raster_info(filename).dtype
 
 
 def get_raster_driver(filename: Filename) -> str:
@@ -306,22 +481,21 @@ def get_raster_driver(filename: Filename) -> str:
     str
         Driver name.
     """
-    ds = gdal.Open(fspath(filename))
-    driver = ds.GetDriver().ShortName
-    return driver
+    return _raster_info(filename).driver
 
 
 def get_raster_bounds(
     filename: Optional[Filename] = None, ds: Optional[gdal.Dataset] = None
 ) -> Bbox:
     """Get the (left, bottom, right, top) bounds of the image."""
-    if ds is None:
-        if filename is None:
-            raise ValueError("Must provide either `filename` or `ds`")
-        ds = gdal.Open(fspath(filename))
-
-    gt = ds.GetGeoTransform()
-    xsize, ysize = ds.RasterXSize, ds.RasterYSize
+    if ds is not None:
+        gt = ds.GetGeoTransform()
+        xsize, ysize = ds.RasterXSize, ds.RasterYSize
+    elif filename is not None:
+        info = _raster_info(filename)
+        gt, xsize, ysize = info.geotransform, info.xsize, info.ysize
+    else:
+        raise ValueError("Must provide either `filename` or `ds`")
 
     left, top = _apply_gt(gt=gt, x=0, y=0)
     right, bottom = _apply_gt(gt=gt, x=xsize, y=ysize)
@@ -330,24 +504,39 @@ def get_raster_bounds(
 
 
 def rowcol_to_xy(
-    row: int,
-    col: int,
+    row: ArrayLike,
+    col: ArrayLike,
     ds: Optional[gdal.Dataset] = None,
     filename: Optional[Filename] = None,
-) -> tuple[float, float]:
-    """Convert indexes in the image space to georeferenced coordinates."""
+) -> tuple[Any, Any]:
+    """Convert indexes in the image space to georeferenced coordinates.
+
+    `row` and `col` may be scalars, or arrays to convert many indexes at once.
+    """
     return _apply_gt(ds, filename, col, row)
 
 
 def xy_to_rowcol(
-    x: float,
-    y: float,
+    x: ArrayLike,
+    y: ArrayLike,
     ds: Optional[gdal.Dataset] = None,
     filename: Optional[Filename] = None,
     do_round=True,
-) -> tuple[int, int]:
-    """Convert coordinates in the georeferenced space to a row and column index."""
+) -> tuple[Any, Any]:
+    """Convert coordinates in the georeferenced space to a row and column index.
+
+    `x` and `y` may be scalars, or 1D arrays to convert many coordinates at once,
+    in which case integer arrays of (rows, cols) are returned.
+    """
     col, row = _apply_gt(ds, filename, x, y, inverse=True)
+    if np.ndim(row) > 0:
+        if do_round:
+            # `row`/`col` are new arrays from `_apply_gt`, so round in place
+            for arr in (row, col):
+                arr += 0.5
+                np.floor(arr, out=arr)
+        return row.astype(np.intp), col.astype(np.intp)
+
     # Need to convert to int, otherwise we get a float
     if do_round:
         # round up to the nearest pixel, instead of banker's rounding
@@ -358,22 +547,22 @@ def xy_to_rowcol(
 
 def _apply_gt(
     ds=None, filename=None, x=None, y=None, inverse=False, gt=None
-) -> tuple[float, float]:
+) -> tuple[Any, Any]:
     """Read the (possibly inverse) geotransform, apply to the x/y coordinates."""
     if gt is None:
         if ds is None:
-            ds = gdal.Open(fspath(filename))
-            gt = ds.GetGeoTransform()
-            ds = None
+            gt = get_raster_gt(filename)
         else:
             gt = ds.GetGeoTransform()
 
     if inverse:
         gt = gdal.InvGeoTransform(gt)
+    if np.ndim(x) > 0 or np.ndim(y) > 0:
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
     # Reference: https://gdal.org/tutorials/geotransforms_tut.html
-    x = gt[0] + x * gt[1] + y * gt[2]
-    y = gt[3] + x * gt[4] + y * gt[5]
-    return x, y
+    x_out = gt[0] + x * gt[1] + y * gt[2]
+    y_out = gt[3] + x * gt[4] + y * gt[5]
+    return x_out, y_out
 
 
 def write_arr(
@@ -446,44 +635,52 @@ def write_arr(
         projection=projection,
         nodata=nodata,
     )
-    drv = gdal.GetDriverByName(fi.driver)
-    ds_out = drv.Create(
-        fspath(output_name),
-        fi.xsize,
-        fi.ysize,
-        fi.nbands,
-        fi.gdal_dtype,
-        options=fi.options,
-    )
+    drv = _get_driver(fi.driver)
+    # Lets GTiff compress multiple blocks in parallel when the data is flushed
+    with _gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+        ds_out = drv.Create(
+            fspath(output_name),
+            fi.xsize,
+            fi.ysize,
+            fi.nbands,
+            fi.gdal_dtype,
+            options=fi.options,
+        )
 
     # Set the geo/proj information
     if fi.projection:
-        # Make sure we're got a correct format for the projection
-        # this still works if we're passed a WKT string
-        proj = CRS.from_user_input(fi.projection).to_wkt()
+        if projection is None:
+            # Came from `like_filename`, so GDAL already gave us WKT
+            proj = fi.projection
+        else:
+            # Make sure we're got a correct format for the projection
+            # this still works if we're passed a WKT string
+            proj = CRS.from_user_input(fi.projection).to_wkt()
         ds_out.SetProjection(proj)
 
     if fi.geotransform is not None:
         ds_out.SetGeoTransform(fi.geotransform)
 
-    # Write the actual data
-    if arr is not None:
-        if arr.ndim == 2:
-            arr = arr[np.newaxis, ...]
-        for i in range(fi.nbands):
+    # Write the actual data, and set the nodata value for each band
+    if arr is not None and arr.ndim == 2:
+        arr = arr[np.newaxis, ...]
+    for i in range(fi.nbands):
+        bnd = ds_out.GetRasterBand(i + 1)
+        if fi.nodata is not None:
+            bnd.SetNoDataValue(fi.nodata)
+        if arr is not None:
             logger.debug(f"Writing band {i+1}/{fi.nbands}")
-            bnd = ds_out.GetRasterBand(i + 1)
             bnd.WriteArray(arr[i])
 
-    # Set the nodata value for each band
-    if fi.nodata is not None:
-        for i in range(fi.nbands):
-            logger.debug(f"Setting nodata for band {i+1}/{fi.nbands}")
-            bnd = ds_out.GetRasterBand(i + 1)
-            bnd.SetNoDataValue(fi.nodata)
-
     ds_out.FlushCache()
     ds_out = None
+    _clear_raster_info(output_name)
+
+
+@lru_cache(maxsize=None)
+def _get_driver(name: str) -> gdal.Driver:
+    # Drivers are registered once per process, so the handles can be reused
+    return gdal.GetDriverByName(name)
 
 
 def write_block(
@@ -510,15 +707,15 @@ def write_block(
     ValueError
         If length of `output_files` does not match length of `cur_block`.
     """
-    if cur_block.ndim == 2:
-        # Make into 3D array shaped (1, rows, cols)
-        cur_block = cur_block[np.newaxis, ...]
     # filename must be pre-made
     filename = Path(filename)
     if not filename.exists():
         raise ValueError(f"File {filename} does not exist")
 
     if filename.suffix in (".h5", ".hdf5", ".nc"):
+        if cur_block.ndim == 2:
+            # Make into 3D array shaped (1, rows, cols)
+            cur_block = cur_block[np.newaxis, ...]
         _write_hdf5(cur_block, filename, row_start, col_start)
     else:
         _write_gdal(cur_block, filename, row_start, col_start)
@@ -531,14 +728,24 @@ def _write_gdal(
     col_start: int,
 ):
     ds = gdal.Open(fspath(filename), gdal.GA_Update)
+    _write_to_dataset(ds, cur_block, row_start, col_start)
+    ds.FlushCache()
+    ds = None
+
+
+def _write_to_dataset(
+    ds: gdal.Dataset, cur_block: np.ndarray, row_start: int, col_start: int
+):
+    if cur_block.ndim == 2:
+        # Single band: write directly, skip the per-band loop
+        ds.GetRasterBand(1).WriteArray(cur_block, col_start, row_start)
+        return
     for b_idx, cur_image in enumerate(cur_block, start=1):
         bnd = ds.GetRasterBand(b_idx)
         # only need offset for write:
         # https://gdal.org/api/python/osgeo.gdal.html#osgeo.gdal.Band.WriteArray
         bnd.WriteArray(cur_image, col_start, row_start)
-        bnd.FlushCache()
         bnd = None
-    ds = None
 
 
 def _write_hdf5(
@@ -547,11 +754,30 @@ def _write_hdf5(
     row_start: int,
     col_start: int,
 ):
+    with h5py.File(filename, "a") as hf:
+        _write_to_h5(hf, cur_block, row_start, col_start)
+
+
+def _write_to_h5(
+    hf: h5py.File, cur_block: np.ndarray, row_start: int, col_start: int
+):
+    """Write `cur_block` into the (only) raster dataset of an open HDF5 file."""
+    dsets: list[h5py.Dataset] = []
+    hf.visititems(
+        lambda _, obj: dsets.append(obj) if isinstance(obj, h5py.Dataset) else None
+    )
+    dsets = [d for d in dsets if d.ndim >= 2]
+    if len(dsets) != 1:
+        raise ValueError(
+            f"Expected one 2D/3D dataset in {hf.filename}, found {len(dsets)}"
+        )
+    dset = dsets[0]
+    if dset.ndim == 2 and cur_block.ndim == 3:
+        cur_block = cur_block[0]
     nrows, ncols = cur_block.shape[-2:]
     row_slice = slice(row_start, row_start + nrows)
     col_slice = slice(col_start, col_start + ncols)
-    with h5py.File(filename, "a") as hf:
-        hf[row_slice, col_slice] = cur_block
+    dset[..., row_slice, col_slice] = cur_block
 
 
 @dataclass
@@ -584,10 +810,8 @@ class FileInfo:
         projection: Optional[Any] = None,
         nodata: Optional[Union[float, str]] = None,
     ) -> FileInfo:
-        if like_filename is not None:
-            ds_like = gdal.Open(fspath(like_filename))
-        else:
-            ds_like = None
+        # Use the (cached) metadata rather than opening `like_filename` again
+        info_like = _raster_info(like_filename) if like_filename is not None else None
 
         xsize = ysize = gdal_dtype = None
         if arr is not None:
@@ -600,7 +824,7 @@ class FileInfo:
             if shape is not None:
                 ysize, xsize = shape
             else:
-                xsize, ysize = ds_like.RasterXSize, ds_like.RasterYSize
+                xsize, ysize = info_like.xsize, info_like.ysize
                 # If using strides, adjust the output shape
                 if strides is not None:
                     ysize, xsize = compute_out_shape((ysize, xsize), strides)
@@ -608,21 +832,20 @@ class FileInfo:
             if dtype is not None:
                 gdal_dtype = numpy_to_gdal_type(dtype)
             else:
-                gdal_dtype = ds_like.GetRasterBand(1).DataType
+                gdal_dtype = info_like.gdal_dtype
 
         if any(v is None for v in (xsize, ysize, gdal_dtype)):
             raise ValueError("Must specify either `arr` or `like_filename`")
         assert gdal_dtype is not None
 
-        if nodata is None and ds_like is not None:
-            b = ds_like.GetRasterBand(1)
-            nodata = b.GetNoDataValue()
+        if nodata is None and info_like is not None and info_like.count > 0:
+            nodata = info_like.nodata[0]
 
         if nbands is None:
             if arr is not None:
                 nbands = arr.shape[0]
-            elif ds_like is not None:
-                nbands = ds_like.RasterCount
+            elif info_like is not None:
+                nbands = info_like.count
             else:
                 nbands = 1
 
@@ -630,19 +853,19 @@ class FileInfo:
             if str(output_name).endswith(".tif"):
                 driver = "GTiff"
             else:
-                if not ds_like:
+                if info_like is None:
                     raise ValueError("Must specify `driver` if `like_filename` is None")
-                driver = ds_like.GetDriver().ShortName
+                driver = info_like.driver
         if options is None and driver == "GTiff":
             options = list(DEFAULT_TIFF_OPTIONS)
         if not options:
             options = []
 
         # If not provided, attempt to get projection/geotransform from like_filename
-        if projection is None and ds_like is not None:
-            projection = ds_like.GetProjection()
-        if geotransform is None and ds_like is not None:
-            geotransform = ds_like.GetGeoTransform()
+        if projection is None and info_like is not None:
+            projection = info_like.projection
+        if geotransform is None and info_like is not None:
+            geotransform = info_like.geotransform
             # If we're using strides, adjust the geotransform
             if strides is not None:
                 geotransform = list(geotransform)
@@ -664,9 +887,16 @@ class FileInfo:
 
 
 class Writer(BackgroundWriter):
-    """Class to write data to files in a background thread."""
+    """Class to write data to files in a background thread.
+
+    Each output file is opened once and kept open until `notify_finished`,
+    so GDAL (or the HDF5 chunk cache) can cache and combine the block writes.
+    """
 
     def __init__(self, max_queue: int = 0, debug: bool = False, **kwargs):
+        # Open datasets, only used from the background thread
+        self._handles: dict[str, gdal.Dataset] = {}
+        self._h5_handles: dict[str, h5py.File] = {}
         if debug is False:
             super().__init__(nq=max_queue, name="Writer", **kwargs)
         else:
@@ -694,7 +924,47 @@ class Writer(BackgroundWriter):
         ValueError
             If length of `output_files` does not match length of `cur_block`.
         """
-        write_block(data, filename, row_start, col_start)
+        if Path(filename).suffix in (".h5", ".hdf5", ".nc"):
+            _write_to_h5(self._get_h5_handle(filename), data, row_start, col_start)
+            return
+        _write_to_dataset(self._get_handle(filename), data, row_start, col_start)
+
+    def _get_handle(self, filename: Filename) -> gdal.Dataset:
+        key = fspath(filename)
+        if key not in self._handles:
+            if not Path(filename).exists():
+                raise ValueError(f"File {filename} does not exist")
+            with _gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+                self._handles[key] = gdal.Open(key, gdal.GA_Update)
+        return self._handles[key]
+
+    def _get_h5_handle(self, filename: Filename) -> h5py.File:
+        key = fspath(filename)
+        if key not in self._h5_handles:
+            if not Path(filename).exists():
+                raise ValueError(f"File {filename} does not exist")
+            # Larger chunk cache than h5py's 1 MB default, so that partial
+            # writes to compressed chunks along block edges stay in memory
+            self._h5_handles[key] = h5py.File(
+                key, "a", rdcc_nbytes=_H5_CHUNK_CACHE_BYTES, rdcc_nslots=100_003
+            )
+        return self._h5_handles[key]
+
+    def notify_finished(self, timeout=None):
+        """Wait for all queued writes to finish, then close the output files."""
+        super().notify_finished(timeout=timeout)
+        self.close()
+
+    def close(self):
+        """Flush and close all files opened for writing."""
+        for key, ds in self._handles.items():
+            ds.FlushCache()
+            _clear_raster_info(key)
+        self._handles.clear()
+        for key, hf in self._h5_handles.items():
+            hf.close()
+            _clear_raster_info(key)
+        self._h5_handles.clear()
 
     @property
     def num_queued(self):
@@ -703,7 +973,16 @@ class Writer(BackgroundWriter):
 
 
 class EagerLoader(BackgroundReader):
-    """Class to pre-fetch data chunks in a background thread."""
+    """Class to pre-fetch data chunks in a background thread.
+
+    Blocks are yielded in the same order as `self.slices`.
+    With `io_workers > 1`, up to `queue_size + io_workers` blocks are read
+    concurrently by a thread pool, so that decompression of several blocks
+    overlaps with processing of the current one. The pool replaces the single
+    background reader thread, which then sits idle until `notify_finished`.
+    Each block in flight is held in memory, so `block_shape` should be chosen
+    with this in mind.
+    """
 
     def __init__(
         self,
@@ -715,6 +994,7 @@ class EagerLoader(BackgroundReader):
         queue_size: int = 1,
         timeout: float = _DEFAULT_TIMEOUT,
         show_progress: bool = True,
+        io_workers: int = 1,
     ):
         super().__init__(nq=queue_size, timeout=timeout, name="EagerLoader")
         self.filename = filename
@@ -729,6 +1009,7 @@ class EagerLoader(BackgroundReader):
             )
         )
         self._queue_size = queue_size
+        self._io_workers = max(1, io_workers)
         self._skip_empty = skip_empty
         self._nodata_mask = nodata_mask
         self._block_shape = block_shape
@@ -736,6 +1017,25 @@ class EagerLoader(BackgroundReader):
         self._show_progress = show_progress
         if self._nodata is None:
             self._nodata = np.nan
+        self._empty_blocks = [False] * len(self.slices)
+        if skip_empty and nodata_mask is not None:
+            self._empty_blocks = self._find_empty_blocks(nodata_mask)
+
+    def _find_empty_blocks(self, nodata_mask: ArrayLike) -> list[bool]:
+        """Mark which of `self.slices` are entirely covered by `nodata_mask`.
+
+        Each row of blocks is reduced once to a per-column "has data" vector,
+        so the mask is scanned in a single pass instead of once per block.
+        """
+        mask = np.asarray(nodata_mask, dtype=bool)
+        col_has_data: dict[tuple[int, int], np.ndarray] = {}
+        empty_blocks = []
+        for rows, cols in self.slices:
+            key = (rows.start, rows.stop)
+            if key not in col_has_data:
+                col_has_data[key] = ~mask[rows].all(axis=0)
+            empty_blocks.append(not col_has_data[key][cols].any())
+        return empty_blocks
 
     def read(self, rows: slice, cols: slice) -> tuple[np.ndarray, tuple[slice, slice]]:
         logger.debug(f"EagerLoader reading {rows}, {cols}")
@@ -745,37 +1045,81 @@ class EagerLoader(BackgroundReader):
     def iter_blocks(
         self,
     ) -> Generator[tuple[np.ndarray, tuple[slice, slice]], None, None]:
-        # Queue up all slices to the work queue
         queued_slices = []
-        for rows, cols in self.slices:
+        for (rows, cols), is_empty in zip(self.slices, self._empty_blocks):
             # Skip queueing a read if all nodata
-            if self._skip_empty and self._nodata_mask is not None:
-                logger.debug("Checking nodata mask")
-                if self._nodata_mask[rows, cols].all():
-                    logger.debug("Skipping!")
-                    continue
-            self.queue_read(rows, cols)
+            if is_empty:
+                logger.debug(f"Skipping {rows}, {cols}: all nodata in mask")
+                continue
             queued_slices.append((rows, cols))
 
-        s_iter = range(len(queued_slices))
+        if self._io_workers > 1:
+            loaded = self._read_with_pool(queued_slices)
+        else:
+            loaded = self._read_in_background(queued_slices)
+
         desc = f"Processing {self._block_shape} sized blocks..."
         with progress(dummy=not self._show_progress) as p:
-            for _ in p.track(s_iter, description=desc):
-                cur_block, (rows, cols) = self.get_data()
+            for cur_block, (rows, cols) in p.track(
+                loaded, total=len(queued_slices), description=desc
+            ):
                 logger.debug(f"got data for {rows, cols}: {cur_block.shape}")
 
                 # Otherwise look at the actual block we loaded
-                if np.isnan(self._nodata):
-                    block_nodata = np.isnan(cur_block)
-                else:
-                    block_nodata = cur_block == self._nodata
-                if np.all(block_nodata):
+                if _is_all_nodata(cur_block, float(self._nodata)):
                     logger.debug("Skipping block since it was all nodata")
                     continue
                 yield cur_block, (rows, cols)
 
         self.notify_finished()
 
+    def _read_in_background(
+        self, queued_slices: list[tuple[slice, slice]]
+    ) -> Generator[tuple[np.ndarray, tuple[slice, slice]], None, None]:
+        # Queue up all slices to the work queue of the background thread
+        for rows, cols in queued_slices:
+            self.queue_read(rows, cols)
+        for _ in range(len(queued_slices)):
+            yield self.get_data()
+
+    def _read_with_pool(
+        self, queued_slices: list[tuple[slice, slice]]
+    ) -> Generator[tuple[np.ndarray, tuple[slice, slice]], None, None]:
+        # Keep a bounded window of reads in flight, yielding them in order
+        max_pending = self._queue_size + self._io_workers
+        slice_iter = iter(queued_slices)
+        pending: deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self._io_workers) as ex:
+            for rows, cols in slice_iter:
+                pending.append(ex.submit(self.read, rows, cols))
+                if len(pending) >= max_pending:
+                    break
+            while pending:
+                fut = pending.popleft()
+                next_slices = next(slice_iter, None)
+                if next_slices is not None:
+                    pending.append(ex.submit(self.read, *next_slices))
+                yield fut.result()
+
+
+@njit(nogil=True)
+def _is_all_nodata(arr: np.ndarray, nodata: float) -> bool:
+    """Check if every element of `arr` is `nodata` (or NaN, if `nodata` is NaN).
+
+    Returns as soon as a valid element is found, without creating
+    a boolean mask the size of `arr`.
+    """
+    if np.isnan(nodata):
+        for x in arr.flat:
+            # NaN is the only value which is not equal to itself
+            if x == x:
+                return False
+    else:
+        for x in arr.flat:
+            if x != nodata:
+                return False
+    return True
+
 
 def get_max_block_shape(
     filename: Filename, nstack: int, max_bytes: float = 64e6
@@ -806,10 +1150,9 @@ def get_max_block_shape(
     chunk_cols = min(max(16, chunk_cols), xsize)
     chunk_rows = min(max(16, chunk_rows), ysize)
 
-    ds = gdal.Open(fspath(filename))
-    shape = (ds.RasterYSize, ds.RasterXSize)
+    shape = (ysize, xsize)
     # get the size of the data type from the raster
-    nbytes = gdal_to_numpy_type(ds.GetRasterBand(1).DataType).itemsize
+    nbytes = get_raster_dtype(filename).itemsize
     return _increment_until_max(
         max_bytes=max_bytes,
         file_chunk_size=[chunk_rows, chunk_cols],
@@ -824,13 +1167,10 @@ def get_raster_chunk_size(filename: Filename) -> list[int]:
 
     This is called blockXsize, blockYsize by GDAL.
     """
-    ds = gdal.Open(fspath(filename))
-    block_size = ds.GetRasterBand(1).GetBlockSize()
-    for i in range(2, ds.RasterCount + 1):
-        if block_size != ds.GetRasterBand(i).GetBlockSize():
-            logger.warning(f"Warning: {filename} bands have different block shapes.")
-            break
-    return block_size
+    info = _raster_info(filename)
+    if not info.same_block_sizes:
+        logger.warning(f"Warning: {filename} bands have different block shapes.")
+    return list(info.block_size)
 
 
 def _format_date_pair(start: date, end: date, fmt=DEFAULT_DATETIME_FORMAT) -> str:
@@ -844,28 +1184,39 @@ def _increment_until_max(
     nstack: int,
     bytes_per_pixel: int = 8,
 ) -> tuple[int, int]:
-    """Find size of 3D chunk to load while staying at ~`max_bytes` bytes of RAM."""
-    chunk_rows, chunk_cols = file_chunk_size
+    """Find size of 3D chunk to load while staying at ~`max_bytes` bytes of RAM.
 
-    # How many chunks can we fit in max_bytes?
-    chunks_per_block = max_bytes / (
-        (nstack * chunk_rows * chunk_cols) * bytes_per_pixel
-    )
-    num_chunks = [1, 1]
-    cur_block_shape = [chunk_rows, chunk_cols]
+    The block grows by one file chunk at a time, alternating between columns
+    and rows, and stops at the first shape using at least `max_bytes` (or at
+    the full `shape`).
+    Since the memory use only increases with each step, the stopping step is
+    found with a bisection rather than by trying every step.
+    """
+    chunk_rows, chunk_cols = file_chunk_size
+    nrows, ncols = shape
 
-    idx = 1  # start incrementing cols
-    while chunks_per_block > 1 and tuple(cur_block_shape) != tuple(shape):
-        # Alternate between adding a row and column chunk by flipping the idx
-        chunk_idx = idx % 2
-        nc = num_chunks[chunk_idx]
-        chunk_size = file_chunk_size[chunk_idx]
+    def _block_shape(step: int) -> tuple[int, int]:
+        # Steps go (1, 1), (1, 2), (2, 2), (2, 3), ... chunks
+        return (
+            min((step // 2 + 1) * chunk_rows, nrows),
+            min(((step + 1) // 2 + 1) * chunk_cols, ncols),
+        )
 
-        cur_block_shape[chunk_idx] = min(nc * chunk_size, shape[chunk_idx])
+    def _under_max(step: int) -> bool:
+        rows, cols = _block_shape(step)
+        return max_bytes / (nstack * rows * cols * bytes_per_pixel) > 1
 
-        chunks_per_block = max_bytes / (
-            nstack * np.prod(cur_block_shape) * bytes_per_pixel
-        )
-        num_chunks[chunk_idx] += 1
-        idx += 1
-    return cur_block_shape[0], cur_block_shape[1]
+    # First step where the block covers the full `shape`
+    last_step = max(
+        2 * (math.ceil(nrows / chunk_rows) - 1),
+        2 * (math.ceil(ncols / chunk_cols) - 1) - 1,
+        0,
+    )
+    lo, hi = 0, last_step
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _under_max(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    return _block_shape(lo)
@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import shutil
-import warnings
+import subprocess
+import sys
 from collections import namedtuple
+from os import fspath
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
+from numba import njit, prange
 from numpy.typing import ArrayLike
 from osgeo import gdal
 
@@ -36,8 +39,9 @@ def create_ps(
     existing_amp_dispersion_file: Optional[Filename] = None,
     nodata_mask: Optional[np.ndarray] = None,
     update_existing: bool = False,
-    block_shape: tuple[int, int] = (512, 512),
+    block_shape: Optional[tuple[int, int]] = None,
     show_progress: bool = True,
+    io_workers: int = 1,
 ):
     """Create the amplitude dispersion, mean, and PS files.
 
@@ -67,9 +71,13 @@ def create_ps(
         Default is False.
     block_shape : tuple[int, int], optional
         The 2D block size to load all bands at a time.
-        Default is (512, 512)
+        By default, uses full-width strips of rows if the SLCs are stored
+        by line/strip on disk, and (512, 512) otherwise.
     show_progress : bool, default=True
         If true, displays a `rich.ProgressBar`.
+    io_workers : int, default=1
+        Number of threads reading SLC blocks concurrently. Values above 1 help
+        with compressed SLCs, at the cost of holding more blocks in memory.
     """
     if existing_amp_dispersion_file and existing_amp_mean_file and not update_existing:
         logger.info("Using existing amplitude dispersion file, skipping calculation.")
@@ -88,6 +96,11 @@ def create_ps(
     # Initialize the output files with zeros
     file_list = [output_file, output_amp_dispersion_file, output_amp_mean_file]
     for fn, dtype, nodata in zip(file_list, FILE_DTYPES, NODATA_VALUES):
+        options = list(io.DEFAULT_TIFF_OPTIONS)
+        if np.issubdtype(dtype, np.floating):
+            # Lossless floating point predictor: the mean/dispersion compress
+            # noticeably better, so there is less to write and read back
+            options.append("PREDICTOR=3")
         io.write_arr(
             arr=None,
             like_filename=slc_vrt_file,
@@ -95,14 +108,32 @@ def create_ps(
             nbands=1,
             dtype=dtype,
             nodata=nodata,
+            options=options,
         )
 
     vrt_stack = VRTStack.from_vrt_file(slc_vrt_file)
-
-    # Initialize the intermediate arrays for the calculation
-    magnitude = np.zeros((len(vrt_stack), *block_shape), dtype=np.float32)
+    if block_shape is None:
+        block_shape = _get_default_block_shape(vrt_stack)
+    logger.debug(f"Using block shape {block_shape}")
+
+    # If updating, get how many SLCs went into the existing mean/dispersion
+    n_existing = None
+    if update_existing and existing_amp_mean_file and existing_amp_dispersion_file:
+        n_existing = _get_num_slcs(existing_amp_dispersion_file)
+        if n_existing is None:
+            logger.warning(
+                f"{existing_amp_dispersion_file} has no {_NUM_SLCS_KEY!r} metadata:"
+                " computing the PS files from the current SLC stack only."
+            )
 
     skip_empty = nodata_mask is None
+    # Blocks of nodata for the (ps, amp_dispersion, amp_mean) outputs
+    nodata_blocks = PsFileOptions(
+        *(
+            np.full(block_shape, nodata, dtype=dtype)
+            for dtype, nodata in zip(FILE_DTYPES, NODATA_VALUES)
+        )
+    )
 
     writer = io.Writer()
     # Make the generator for the blocks
@@ -111,34 +142,46 @@ def create_ps(
         skip_empty=skip_empty,
         nodata_mask=nodata_mask,
         show_progress=show_progress,
+        io_workers=io_workers,
     )
     for cur_data, (rows, cols) in block_gen:
         cur_rows, cur_cols = cur_data.shape[-2:]
 
-        if not (np.all(cur_data == 0) or np.all(np.isnan(cur_data))):
-            magnitude_cur = np.abs(cur_data, out=magnitude[:, :cur_rows, :cur_cols])
-            mean, amp_disp, ps = calc_ps_block(
-                # use min_count == size of stack so that ALL need to be not Nan
-                magnitude_cur,
-                amp_dispersion_threshold,
-                min_count=len(magnitude_cur),
-            )
-
-            # Use the UInt8 type for the PS to save.
+        # Both checks stop at the first valid pixel, so they're cheap on real data
+        all_empty = io._is_all_nodata(cur_data, 0.0) or io._is_all_nodata(
+            cur_data, np.nan
+        )
+        if not all_empty:
+            if n_existing is None:
+                # The magnitude is taken inside `calc_ps_block`, so pass the SLCs
+                mean, amp_disp, ps = calc_ps_block(
+                    cur_data,
+                    amp_dispersion_threshold,
+                    # use min_count == size of stack so that ALL need to be not Nan
+                    min_count=len(cur_data),
+                )
+            else:
+                assert existing_amp_mean_file and existing_amp_dispersion_file
+                mean, amp_disp, ps = _update_ps_block(
+                    cur_data,
+                    existing_mean=io.load_gdal(
+                        existing_amp_mean_file, rows=rows, cols=cols
+                    ),
+                    existing_amp_dispersion=io.load_gdal(
+                        existing_amp_dispersion_file, rows=rows, cols=cols
+                    ),
+                    n_existing=n_existing,
+                    amp_dispersion_threshold=amp_dispersion_threshold,
+                )
+
+            # Use the UInt8 type for the PS to save (viewing the bools, no copy)
             # For invalid pixels, set to max Byte value
-            ps = ps.astype(FILE_DTYPES.ps)
+            ps = ps.view(FILE_DTYPES.ps)
             ps[amp_disp == 0] = NODATA_VALUES.ps
         else:
-            # Fill the block with nodata
-            ps = np.ones((cur_rows, cur_cols), dtype=FILE_DTYPES.ps) * NODATA_VALUES.ps
-            mean = np.full(
-                (cur_rows, cur_cols), NODATA_VALUES.amp_mean, dtype=FILE_DTYPES.amp_mean
-            )
-            amp_disp = np.full(
-                (cur_rows, cur_cols),
-                NODATA_VALUES.amp_dispersion,
-                dtype=FILE_DTYPES.amp_dispersion,
-            )
+            # Fill the block with nodata. These are views of the constant blocks,
+            # which are only read by the writer, so they can be shared.
+            ps, amp_disp, mean = (b[:cur_rows, :cur_cols] for b in nodata_blocks)
 
         # Write amp dispersion and the mean blocks
         writer.queue_write(mean, output_amp_mean_file, rows.start, cols.start)
@@ -147,9 +190,39 @@ def create_ps(
 
     logger.info(f"Waiting to write {writer.num_queued} blocks of data.")
     writer.notify_finished()
+    # Record the number of SLCs used, so the files can be updated later
+    n_total = len(vrt_stack) + (n_existing or 0)
+    for fn in (output_amp_mean_file, output_amp_dispersion_file):
+        _set_num_slcs(fn, n_total)
     logger.info("Finished writing out PS files")
 
 
+def _get_default_block_shape(
+    vrt_stack: VRTStack, max_bytes: float = 64e6
+) -> tuple[int, int]:
+    """Choose the block shape for `create_ps` from the SLCs' layout on disk.
+
+    If the SLCs are stored in full-width strips (e.g. untiled GeoTIFFs), 2D
+    tiles would cause many small strided reads, so blocks span all columns with
+    as many rows as fit in `max_bytes`. Otherwise, uses (512, 512) blocks.
+    """
+    first_file = vrt_stack._gdal_file_strings[0]
+    chunk_cols, chunk_rows = io.get_raster_chunk_size(first_file)
+    xsize, _ = io.get_raster_xysize(first_file)
+    if chunk_cols < xsize:
+        return (512, 512)
+
+    ncols, nrows = io.get_raster_xysize(vrt_stack.outfile)
+    return io._increment_until_max(
+        max_bytes=max_bytes,
+        # Load at least 16 lines at a time
+        file_chunk_size=[min(max(16, chunk_rows), nrows), ncols],
+        shape=(nrows, ncols),
+        nstack=len(vrt_stack),
+        bytes_per_pixel=vrt_stack.dtype.itemsize,
+    )
+
+
 def calc_ps_block(
     stack_mag: ArrayLike,
     amp_dispersion_threshold: float = 0.25,
@@ -170,6 +243,8 @@ def calc_ps_block(
     ----------
     stack_mag : ArrayLike
         The magnitude of the stack of SLCs.
+        The complex SLC data may also be passed, in which case the magnitude
+        is computed on the fly without creating an intermediate array.
     amp_dispersion_threshold : float, optional
         The threshold for the amplitude dispersion to label a pixel as a PS:
             ps = amp_disp < amp_dispersion_threshold
@@ -201,29 +276,145 @@ def calc_ps_block(
     Since fewer samples are used to calculate the mean and standard deviation,
     there is a higher false positive risk for these edge pixels.
     """
-    if np.iscomplexobj(stack_mag):
-        raise ValueError("The input `stack_mag` must be real-valued.")
-
     if min_count is None:
         min_count = int(0.9 * stack_mag.shape[0])
 
-    with warnings.catch_warnings():
-        # ignore the warning about nansum/nanmean of empty slice
-        warnings.simplefilter("ignore", category=RuntimeWarning)
+    mean, std_dev, count = _nan_mean_std_count(np.asarray(stack_mag))
+    # Reuse the std. dev. output as the amplitude dispersion
+    ps = _finalize_ps(mean, std_dev, count, min_count, amp_dispersion_threshold)
+    return mean, std_dev, ps
 
-        mean = np.nanmean(stack_mag, axis=0)
-        std_dev = np.nanstd(stack_mag, axis=0)
-        count = np.count_nonzero(~np.isnan(stack_mag), axis=0)
-        amp_disp = std_dev / mean
-    # Mask out the pixels with too few valid pixels
-    amp_disp[count < min_count] = np.nan
-    # replace nans/infinities with 0s, which will mean nodata
-    mean = np.nan_to_num(mean, nan=0, posinf=0, neginf=0, copy=False)
-    amp_disp = np.nan_to_num(amp_disp, nan=0, posinf=0, neginf=0, copy=False)
 
-    ps = amp_disp < amp_dispersion_threshold
-    ps[amp_disp == 0] = False
-    return mean, amp_disp, ps
+@njit(nogil=True, parallel=True)
+def _finalize_ps(
+    mean: np.ndarray,
+    std_dev: np.ndarray,
+    count: np.ndarray,
+    min_count: int,
+    amp_dispersion_threshold: float,
+) -> np.ndarray:
+    """Turn `mean`/`std_dev` into the outputs of `calc_ps_block`, in place.
+
+    In one pass per pixel, `std_dev` becomes the amplitude dispersion, and
+    NaNs/infinities in `mean` and the dispersion (and pixels with fewer than
+    `min_count` samples) are set to 0, meaning nodata.
+    Returns the boolean PS mask.
+    """
+    nrows, ncols = mean.shape
+    ps = np.zeros((nrows, ncols), dtype=np.bool_)
+    for r in prange(nrows):
+        for c in range(ncols):
+            m = mean[r, c]
+            if not np.isfinite(m):
+                m = 0
+                mean[r, c] = 0
+            if m == 0 or count[r, c] < min_count:
+                std_dev[r, c] = 0
+                continue
+            amp_disp = std_dev[r, c] / m
+            if not np.isfinite(amp_disp):
+                amp_disp = 0
+            std_dev[r, c] = amp_disp
+            ps[r, c] = amp_disp != 0 and amp_disp < amp_dispersion_threshold
+    return ps
+
+
+@njit(nogil=True, parallel=True)
+def _nan_mean_std_count(stack: np.ndarray):
+    """Get the NaN-ignoring mean, std. dev. and count of `|stack|` along axis 0.
+
+    Equivalent to `np.nanmean`, `np.nanstd` and `np.count_nonzero(~np.isnan())`
+    of `np.abs(stack)` with `axis=0`, but computed in a single pass over `stack`,
+    which may be real or complex.
+    Pixels with no valid data get a mean and std. dev. of NaN.
+    """
+    nslc, nrows, ncols = stack.shape
+    mean = np.empty((nrows, ncols), dtype=np.float32)
+    std_dev = np.empty((nrows, ncols), dtype=np.float32)
+    count = np.zeros((nrows, ncols), dtype=np.int64)
+    for r in prange(nrows):
+        # Accumulate in float64, shifted by each pixel's first valid value, so
+        # `sumsq / n - mean**2` doesn't cancel away the small spread of bright,
+        # stable pixels (the PS candidates)
+        shift = np.zeros(ncols)
+        total = np.zeros(ncols)
+        sumsq = np.zeros(ncols)
+        n = count[r]
+        # The innermost loop runs along the contiguous column axis
+        for k in range(nslc):
+            row = stack[k, r]
+            for c in range(ncols):
+                v = np.float64(abs(row[c]))
+                if not np.isnan(v):
+                    if n[c] == 0:
+                        shift[c] = v
+                    d = v - shift[c]
+                    total[c] += d
+                    sumsq[c] += d * d
+                    n[c] += 1
+        for c in range(ncols):
+            if n[c] == 0:
+                mean[r, c] = np.nan
+                std_dev[r, c] = np.nan
+                continue
+            dm = total[c] / n[c]
+            mean[r, c] = shift[c] + dm
+            std_dev[r, c] = np.sqrt(max(sumsq[c] / n[c] - dm * dm, 0.0))
+    return mean, std_dev, count
+
+
+def _update_ps_block(
+    stack: np.ndarray,
+    existing_mean: np.ndarray,
+    existing_amp_dispersion: np.ndarray,
+    n_existing: int,
+    amp_dispersion_threshold: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Combine the statistics of a new SLC block with those of an earlier run.
+
+    Uses the pairwise update of Chan et al. for the mean and variance, so only
+    the new SLCs are read. Pixels which are nodata in the existing files
+    (mean of 0) use the new SLCs alone.
+    As in `create_ps`, pixels need to be valid in all new SLCs.
+    """
+    mean, std_dev, count = _nan_mean_std_count(stack)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_a = existing_mean.astype(np.float64)
+        std_a = existing_amp_dispersion * mean_a
+        n_a = np.where(mean_a > 0, n_existing, 0)
+        n = n_a + count
+        delta = mean - mean_a
+        new_mean = mean_a + delta * count / n
+        m2 = std_a**2 * n_a + std_dev.astype(np.float64) ** 2 * count
+        m2 += delta**2 * n_a * count / n
+        new_std = np.sqrt(m2 / n)
+    has_existing = n_a > 0
+    mean[has_existing] = new_mean[has_existing]
+    std_dev[has_existing] = new_std[has_existing]
+
+    # Reuse the std. dev. output as the amplitude dispersion
+    ps = _finalize_ps(mean, std_dev, count, len(stack), amp_dispersion_threshold)
+    return mean, std_dev, ps
+
+
+# Metadata key holding the number of SLCs used for the mean/dispersion files
+_NUM_SLCS_KEY = "N"
+
+
+def _get_num_slcs(filename: Filename) -> Optional[int]:
+    ds = gdal.Open(fspath(filename))
+    # Older (ENVI) files stored it in the ENVI domain
+    value = ds.GetMetadataItem(_NUM_SLCS_KEY) or ds.GetMetadataItem(
+        _NUM_SLCS_KEY, "ENVI"
+    )
+    ds = None
+    return int(value) if value is not None else None
+
+
+def _set_num_slcs(filename: Filename, num_slcs: int) -> None:
+    ds = gdal.Open(fspath(filename), gdal.GA_Update)
+    ds.SetMetadataItem(_NUM_SLCS_KEY, str(num_slcs))
+    ds = None
 
 
 def _use_existing_files(
@@ -235,11 +426,15 @@ def _use_existing_files(
     output_amp_dispersion_file: Filename,
     amp_dispersion_threshold: float,
 ) -> None:
-    amp_disp = io.load_gdal(existing_amp_dispersion_file, masked=True)
-    ps = amp_disp < amp_dispersion_threshold
-    ps = ps.astype(np.uint8)
+    amp_disp = io.load_gdal(existing_amp_dispersion_file)
+    nodata = io.get_raster_nodata(existing_amp_dispersion_file)
+    invalid = amp_disp == 0
+    if nodata is not None:
+        invalid |= np.isnan(amp_disp) if np.isnan(nodata) else amp_disp == nodata
+    # Use the UInt8 type for the PS to save (viewing the bools, no copy)
+    ps = (amp_disp < amp_dispersion_threshold).view(np.uint8)
     # Set the PS nodata value to the max uint8 value
-    ps[(amp_disp == 0) | amp_disp.mask] = NODATA_VALUES.ps
+    ps[invalid] = NODATA_VALUES.ps
     io.write_arr(
         arr=ps,
         like_filename=existing_amp_dispersion_file,
@@ -247,8 +442,26 @@ def _use_existing_files(
         nodata=NODATA_VALUES.ps,
     )
     # Copy the existing amp mean file/amp dispersion file
-    shutil.copy(existing_amp_dispersion_file, output_amp_dispersion_file)
-    shutil.copy(existing_amp_mean_file, output_amp_mean_file)
+    _fast_clone(existing_amp_dispersion_file, output_amp_dispersion_file)
+    _fast_clone(existing_amp_mean_file, output_amp_mean_file)
+
+
+def _fast_clone(src: Filename, dst: Filename) -> None:
+    """Copy `src` to `dst`, using a copy-on-write clone when possible.
+
+    On Linux, `cp --reflink=auto` makes an O(1) clone on filesystems which
+    support it (e.g. XFS, Btrfs), and does a regular copy otherwise.
+    Falls back to `shutil.copy` if `cp` is unavailable or fails.
+    """
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        result = subprocess.run(
+            ["cp", "--reflink=auto", fspath(src), fspath(dst)],
+            capture_output=True,
+        )
+        if result.returncode == 0:
+            return
+        logger.debug(f"cp --reflink=auto failed: {result.stderr.decode().strip()}")
+    shutil.copy(src, dst)
 
 
 def multilook_ps_mask(
@@ -287,13 +500,11 @@ def multilook_ps_mask(
         return out_path
 
     ps_mask = io.load_gdal(ps_mask_file, masked=True).astype(bool).filled(False)
-    full_rows, full_cols = ps_mask.shape
+    # Cutting off the partial edge looks gives the same size as the MLE
+    # result/temp_coh: (full_rows // strides["y"], full_cols // strides["x"])
     ps_mask_looked = utils.take_looks(
-        ps_mask, strides["y"], strides["x"], func_type="any", edge_strategy="pad"
+        ps_mask, strides["y"], strides["x"], func_type="any", edge_strategy="cutoff"
     )
-    # make sure it's the same size as the MLE result/temp_coh after padding
-    out_rows, out_cols = full_rows // strides["y"], full_cols // strides["x"]
-    ps_mask_looked = ps_mask_looked[:out_rows, :out_cols]
     ps_mask_looked = ps_mask_looked.astype("uint8")
     io.write_arr(
         arr=ps_mask_looked,
@@ -365,6 +365,8 @@ class VRTStack:
         skip_empty: bool = True,
         nodata_mask: Optional[np.ndarray] = None,
         show_progress: bool = True,
+        queue_size: int = 1,
+        io_workers: int = 1,
     ) -> Generator[tuple[np.ndarray, tuple[slice, slice]], None, None]:
         """Iterate over blocks of the stack.
 
@@ -386,6 +388,11 @@ class VRTStack:
             1s are the nodata values, 0s are valid data.
         show_progress : bool, default=True
             If true, displays a `rich` ProgressBar.
+        queue_size : int, default=1
+            Number of blocks to load ahead of the one being processed.
+        io_workers : int, default=1
+            Number of threads reading blocks concurrently (see `io.EagerLoader`).
+            Each block in flight is held in memory.
 
         Yields
         ------
@@ -400,6 +407,8 @@ class VRTStack:
             nodata_mask=nodata_mask,
             skip_empty=skip_empty,
             show_progress=show_progress,
+            queue_size=queue_size,
+            io_workers=io_workers,
         )
         yield from self._loader.iter_blocks()
 
@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import math
-import subprocess
-import tempfile
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from functools import lru_cache
 from os import fspath
 from pathlib import Path
 from typing import Iterable, Optional, Sequence, Union
@@ -20,6 +22,11 @@ from dolphin._types import Bbox, Filename
 
 logger = get_log(__name__)
 
+# Split the warp kernel's work over all CPUs
+_WARP_THREAD_OPTIONS = ["NUM_THREADS=ALL_CPUS"]
+# Opening files is latency-bound, so use more threads than CPUs for the scan
+_MAX_SCAN_WORKERS = 16
+
 
 def merge_by_date(
     image_file_list: list[Filename],
@@ -76,6 +83,11 @@ def merge_by_date(
     (from interferograms).
     """
     grouped_images = utils.group_by_date(image_file_list, file_date_fmt=file_date_fmt)
+    # Find these once for all dates, so every stitched image uses the same grid
+    projection, res = None, None
+    if image_file_list:
+        projection = _get_mode_projection(image_file_list)
+        res = _get_resolution(image_file_list)
     stitched_acq_times = {}
     Path(output_dir).mkdir(parents=True, exist_ok=True)
 
@@ -99,6 +111,8 @@ def merge_by_date(
             out_bounds_epsg=out_bounds_epsg,
             in_nodata=in_nodata,
             options=options,
+            projection=projection,
+            res=res,
         )
 
         stitched_acq_times[dates] = outfile
@@ -117,10 +131,12 @@ def merge_images(
     out_nodata: Optional[Union[float, str]] = 0,
     out_dtype: Optional[DTypeLike] = None,
     in_nodata: Optional[Union[float, str]] = None,
-    resample_alg: str = "lanczos",
+    resample_alg: str = "bilinear",
     overwrite=False,
     options: Optional[Sequence[str]] = io.DEFAULT_ENVI_OPTIONS,
     create_only: bool = False,
+    projection: Optional[str] = None,
+    res: Optional[tuple[float, float]] = None,
 ) -> None:
     """Combine multiple SLC images on the same date into one image.
 
@@ -153,15 +169,23 @@ def merge_images(
         of the first image in the list.
     in_nodata : Optional[float | str]
         Override the files' `nodata` and use `in_nodata` during merging.
-    resample_alg : str, default="lanczos"
+    resample_alg : str, default="bilinear"
         Method for gdal to use for reprojection.
-        Default is lanczos (sinc-kernel)
+        Default is bilinear. Files already in the most common projection are
+        not interpolated. Use "lanczos" (sinc kernel) for higher quality when
+        reprojecting, at several times the cost.
     overwrite : bool
         Overwrite existing files. Default is False.
     options : Optional[Sequence[str]]
         Driver-specific creation options passed to GDAL. Default is ["SUFFIX=ADD"]
     create_only : bool
         If True, creates an empty output file, does not write data. Default is False.
+    projection : Optional[str]
+        Projection of the output, as a WKT string or 'EPSG:XXXX' string.
+        Default is None, which uses the most common projection of `file_list`.
+    res : Optional[tuple[float, float]]
+        The [x, y] resolution of `file_list` (before applying `strides`).
+        Default is None, which reads it from `file_list`.
     """
     if Path(outfile).exists():
         if not overwrite:
@@ -183,22 +207,23 @@ def merge_images(
         return
 
     # Make sure all the files are in the same projection.
-    projection = _get_mode_projection(file_list)
-    # If not, warp them to the most common projection using VRT files in a tempdir
-    temp_dir = tempfile.TemporaryDirectory()
+    if projection is None:
+        projection = _get_mode_projection(file_list)
+    # If not, warp them to the most common projection using in-memory VRT files
+    # (VRTs are only XML, so there's no need to write them to disk)
+    temp_dir = Path(f"/vsimem/stitch_{uuid.uuid4().hex}")
 
+    # Downsample in the same warped VRT as the reprojection, if requested
+    if res is None:
+        res = _get_resolution(file_list)
     if strides is not None and strides["x"] > 1 and strides["y"] > 1:
-        file_list = get_downsampled_vrts(
-            file_list,
-            strides=strides,
-            dirname=Path(temp_dir.name),
-        )
+        res = (res[0] * strides["x"], res[1] * strides["y"])
 
     warped_file_list = warp_to_projection(
         file_list,
-        # temp_dir,
-        dirname=Path(temp_dir.name),
+        dirname=temp_dir,
         projection=projection,
+        res=res,
         resample_alg=resample_alg,
     )
     # Compute output array shape. We guarantee it will cover the output
@@ -212,89 +237,96 @@ def merge_images(
     )
     (xmin, ymin, xmax, ymax) = bounds
 
-    # Write out the files for gdal_merge using the --optfile flag
-    optfile = Path(temp_dir.name) / "file_list.txt"
-    optfile.write_text("\n".join(map(str, warped_file_list)))
-    args = [
-        "gdal_merge.py",
-        "-o",
-        outfile,
-        "--optfile",
-        optfile,
-        "-of",
-        driver,
-        "-ul_lr",
-        xmin,
-        ymax,
-        xmax,
-        ymin,
-    ]
-    if out_nodata is not None:
-        args.extend(["-a_nodata", str(out_nodata)])
-    if in_nodata is not None or combined_nodata is not None:
-        ndv = str(in_nodata) if in_nodata is not None else str(combined_nodata)
-        args.extend(["-n", ndv])  # type: ignore
+    # The inputs are now in the same projection and resolution, so the mosaic
+    # only needs to place each pixel: nearest neighbor, like `gdal_merge.py`
+    res = (abs(res[0]), abs(res[1]))
+    src_nodata = in_nodata if in_nodata is not None else combined_nodata
     if out_dtype is not None:
-        out_gdal_dtype = gdal.GetDataTypeName(io.numpy_to_gdal_type(out_dtype))
-        args.extend(["-ot", out_gdal_dtype])
-    if target_aligned_pixels:
-        args.append("-tap")
-    if create_only:
-        args.append("-create")
-    if options is not None:
-        for option in options:
-            args.extend(["-co", option])
-
-    arg_list = [str(a) for a in args]
-    logger.info(f"Running {' '.join(arg_list)}")
-    subprocess.check_call(arg_list)
-
-    temp_dir.cleanup()
-
-
-def get_downsampled_vrts(
-    filenames: Sequence[Filename],
-    strides: dict[str, int],
-    dirname: Filename,
-) -> list[Path]:
-    """Create downsampled VRTs from a list of files.
-
-    Does not reproject, only uses `gdal_translate`.
-
-
-    Parameters
-    ----------
-    filenames : Sequence[Filename]
-        list of filenames to warp.
-    strides : dict[str, int]
-        subsample factor: {"x": x strides, "y": y strides}
-    dirname : Filename
-        The directory to write the warped files to.
+        out_gdal_dtype = io.numpy_to_gdal_type(out_dtype)
+    else:
+        out_gdal_dtype = gdal.GDT_Unknown
 
-    Returns
-    -------
-    list[Filename]
-        The warped filenames.
-    """
-    if not filenames:
-        return []
-    warped_files = []
-    res = _get_resolution(filenames)
-    for idx, fn in enumerate(filenames):
-        fn = Path(fn)
-        warped_fn = Path(dirname) / _get_temp_filename(fn, idx, "_downsampled")
-        logger.debug(f"Downsampling {fn} by {strides}")
-        warped_files.append(warped_fn)
-        gdal.Translate(
-            fspath(warped_fn),
-            fspath(fn),
-            format="VRT",  # Just creates a file that will warp on the fly
-            resampleAlg="nearest",  # nearest neighbor for resampling
-            xRes=res[0] * strides["x"],
-            yRes=res[1] * strides["y"],
+    if create_only:
+        _create_empty_mosaic(
+            warped_file_list[0],
+            outfile=outfile,
+            bounds=bounds,
+            res=res,  # type: ignore
+            projection=projection,
+            driver=driver,
+            out_nodata=out_nodata,
+            out_gdal_dtype=out_gdal_dtype,
+            options=options,
+        )
+    else:
+        # The mosaic VRT is only metadata: the pixels are read once, by Translate
+        mosaic_vrt = fspath(temp_dir / "mosaic.vrt")
+        ds_mosaic = gdal.BuildVRT(
+            mosaic_vrt,
+            [fspath(f) for f in warped_file_list],
+            outputBounds=(xmin, ymin, xmax, ymax),
+            resolution="user",
+            xRes=res[0],
+            yRes=res[1],
+            targetAlignedPixels=target_aligned_pixels,
+            srcNodata=src_nodata,
+            VRTNodata=out_nodata,
+            resampleAlg="nearest",
         )
+        logger.info(f"Merging {len(warped_file_list)} files into {outfile}")
+        # Lets drivers which support it (e.g. GTiff) compress with multiple threads
+        with io._gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+            gdal.Translate(
+                fspath(outfile),
+                ds_mosaic,
+                format=driver,
+                outputType=out_gdal_dtype,
+                noData=out_nodata,
+                creationOptions=list(options or []),
+            )
+        ds_mosaic = None
+
+    gdal.RmdirRecursive(fspath(temp_dir))
+
+
+def _create_empty_mosaic(
+    like_filename: Filename,
+    outfile: Filename,
+    bounds: Bbox,
+    res: tuple[float, float],
+    projection: str,
+    driver: str,
+    out_nodata: Optional[Union[float, str]],
+    out_gdal_dtype: int,
+    options: Optional[Sequence[str]],
+) -> None:
+    """Create the output of `merge_images` without writing any data."""
+    xmin, ymin, xmax, ymax = bounds
+    xsize = int(round((xmax - xmin) / res[0]))
+    ysize = int(round((ymax - ymin) / res[1]))
+    ds_like = gdal.Open(fspath(like_filename))
+    nbands = ds_like.RasterCount
+    if out_gdal_dtype == gdal.GDT_Unknown:
+        out_gdal_dtype = ds_like.GetRasterBand(1).DataType
+    ds_like = None
 
-    return warped_files
+    drv = gdal.GetDriverByName(driver)
+    ds = drv.Create(
+        fspath(outfile),
+        xsize,
+        ysize,
+        nbands,
+        out_gdal_dtype,
+        options=list(options or []),
+    )
+    ds.SetGeoTransform((xmin, res[0], 0, ymax, 0, -res[1]))
+    ds.SetProjection(projection)
+    if out_nodata is not None:
+        for i in range(1, nbands + 1):
+            bnd = ds.GetRasterBand(i)
+            bnd.SetNoDataValue(float(out_nodata))
+            bnd.Fill(float(out_nodata))
+    ds = None
 
 
 def _get_temp_filename(fn: Path, idx: int, extra: str = ""):
@@ -307,11 +339,11 @@ def warp_to_projection(
     dirname: Filename,
     projection: str,
     res: Optional[tuple[float, float]] = None,
-    resample_alg: str = "lanczos",
+    resample_alg: str = "bilinear",
 ) -> list[Path]:
-    """Warp a list of files to `projection`.
+    """Warp a list of files to `projection` and resolution `res`.
 
-    If the input file's projection matches `projection`, the same file is returned.
+    If the input file's projection and resolution match, the same file is returned.
     Otherwise, a new file is created in `dirname` with the same name as the input file,
     but with '_warped' appended.
 
@@ -325,60 +357,94 @@ def warp_to_projection(
         The desired projection, as a WKT string or 'EPSG:XXXX' string.
     res : tuple[float, float]
         The desired [x, y] resolution.
-    resample_alg : str, default="lanczos"
+        If a coarser resolution than the inputs, the files are also downsampled
+        in the same warped VRT.
+    resample_alg : str, default="bilinear"
         Method for gdal to use for reprojection.
-        Default is lanczos (sinc-kernel)
+        Default is bilinear. Use "lanczos" (sinc kernel) for higher quality, at
+        several times the cost.
+        Files which only need to be downsampled use nearest neighbor.
 
     Returns
     -------
     list[Filename]
         The warped filenames.
     """
+    if not filenames:
+        return []
     if projection is None:
         projection = _get_mode_projection(filenames)
     if res is None:
         res = _get_resolution(filenames)
+    xres, yres = abs(res[0]), abs(res[1])
 
-    warped_files = []
-    for idx, fn in enumerate(filenames):
+    def _warp_one(idx: int, fn: Filename) -> Path:
         fn = Path(fn)
-        ds = gdal.Open(fspath(fn))
-        proj_in = ds.GetProjection()
-        if proj_in == projection:
-            warped_files.append(fn)
-            continue
+        info = io._raster_info(fn)
+        proj_in, gt = info.projection, info.geotransform
+        same_res = (abs(gt[1]), abs(gt[5])) == (xres, yres)
+        if proj_in == projection and same_res:
+            return fn
         warped_fn = Path(dirname) / _get_temp_filename(fn, idx, "_warped")
-        warped_fn = Path(dirname) / f"{fn.stem}_{idx}_warped.vrt"
-        from_srs_name = ds.GetSpatialRef().GetName()
-        to_srs_name = osr.SpatialReference(projection).GetName()
-        logger.info(
-            f"Reprojecting {fn} from {from_srs_name} to match mode projection"
-            f" {to_srs_name}"
-        )
-        warped_files.append(warped_fn)
+        if proj_in == projection:
+            logger.debug(f"Downsampling {fn} to resolution {res}")
+            # Only decimating: nearest neighbor, as `gdal_translate` would do
+            cur_resample_alg = "nearest"
+        else:
+            from_srs_name = osr.SpatialReference(proj_in).GetName()
+            to_srs_name = osr.SpatialReference(projection).GetName()
+            logger.info(
+                f"Reprojecting {fn} from {from_srs_name} to match mode projection"
+                f" {to_srs_name}"
+            )
+            cur_resample_alg = resample_alg
         gdal.Warp(
             fspath(warped_fn),
             fspath(fn),
             format="VRT",  # Just creates a file that will warp on the fly
             dstSRS=projection,
-            resampleAlg=resample_alg,
+            resampleAlg=cur_resample_alg,
             targetAlignedPixels=True,  # align in multiples of dx, dy
-            xRes=res[0],
-            yRes=res[1],
+            xRes=xres,
+            yRes=yres,
+            # Saved in the VRT, so the warp kernel is multithreaded when read
+            warpOptions=_WARP_THREAD_OPTIONS,
         )
+        return warped_fn
 
-    return warped_files
+    # Each VRT only needs the file's metadata (and a PROJ lookup), which GDAL
+    # does without the GIL, so make them in parallel. `map` keeps the order.
+    max_workers = min(len(filenames), utils.get_cpu_count())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_warp_one, range(len(filenames)), filenames))
+
+
+def _scan_files(filenames: Iterable[Filename]) -> list[io._RasterInfo]:
+    """Get the metadata (projection, geotransform, nodata, ...) of each file.
+
+    Goes through the `io` metadata cache, so the projection, resolution and
+    bounds checks during stitching only open each file once.
+    Files which aren't cached are opened in parallel, since each open is
+    mostly waiting on (possibly remote) reads with the GIL released.
+    """
+    filenames = list(filenames)
+    if len(filenames) <= 1:
+        return [io._raster_info(fn) for fn in filenames]
+    max_workers = min(len(filenames), _MAX_SCAN_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(io._raster_info, filenames))
 
 
 def _get_mode_projection(filenames: Iterable[Filename]) -> str:
     """Get the most common projection in the list."""
-    projs = [gdal.Open(fspath(fn)).GetProjection() for fn in filenames]
-    return max(set(projs), key=projs.count)
+    projs = [info.projection for info in _scan_files(filenames)]
+    # Ties go to the projection seen first
+    return Counter(projs).most_common(1)[0][0]
 
 
 def _get_resolution(filenames: Iterable[Filename]) -> tuple[float, float]:
     """Get the most common resolution in the list."""
-    gts = [gdal.Open(fspath(fn)).GetGeoTransform() for fn in filenames]
+    gts = [info.geotransform for info in _scan_files(filenames)]
     res = [(dx, dy) for (_, dx, _, _, _, dy) in gts]
     if len(set(res)) > 1:
         raise ValueError(f"The input files have different resolutions: {res}. ")
@@ -424,26 +490,21 @@ def get_combined_bounds_nodata(
         If the inputs files have different resolutions/projections/nodata values
     """
     # scan input files
-    xs = []
-    ys = []
+    all_bounds = []
     resolutions = set()
     projs = set()
     nodatas = set()
 
     # Check all files match in resolution/projection
-    for fn in filenames:
-        ds = gdal.Open(fspath(fn))
-        left, bottom, right, top = io.get_raster_bounds(fn)
-        gt = ds.GetGeoTransform()
+    for fn, info in zip(filenames, _scan_files(filenames)):
+        all_bounds.append(io.get_raster_bounds(fn))
+        gt = info.geotransform
         dx, dy = gt[1], gt[5]
 
         resolutions.add((abs(dx), abs(dy)))  # dy is negative for north-up
-        projs.add(ds.GetProjection())
+        projs.add(info.projection)
 
-        xs.extend([left, right])
-        ys.extend([bottom, top])
-
-        nd = io.get_raster_nodata(fn)
+        nd = info.nodata[0]
         # Need to stringify 'nan', or it is repeatedly added
         nodatas.add(str(nd) if (nd is not None and np.isnan(nd)) else nd)
 
@@ -462,7 +523,10 @@ def get_combined_bounds_nodata(
         else:
             bounds = out_bounds  # type: ignore
     else:
-        bounds = min(xs), min(ys), max(xs), max(ys)
+        # (N, 4) array of (left, bottom, right, top): reduce each axis at once
+        bounds_arr = np.asarray(all_bounds, dtype=np.float64)
+        xs, ys = bounds_arr[:, 0::2], bounds_arr[:, 1::2]
+        bounds = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
 
     if target_aligned_pixels:
         bounds = _align_bounds(bounds, res)
@@ -481,12 +545,20 @@ def _align_bounds(bounds: Iterable[float], res: tuple[float, float]):
 
 
 def _reproject_bounds(bounds: Bbox, src_epsg: int, dst_epsg: int) -> Bbox:
-    t = Transformer.from_crs(src_epsg, dst_epsg, always_xy=True)
+    t = _get_transformer(src_epsg, dst_epsg)
     left, bottom, right, top = bounds
-    bbox: Bbox = (*t.transform(left, bottom), *t.transform(right, top))  # type: ignore
+    # Transform both corners in one call
+    xs, ys = t.transform([left, right], [bottom, top])
+    bbox: Bbox = (xs[0], ys[0], xs[1], ys[1])
     return bbox
 
 
+@lru_cache(maxsize=32)
+def _get_transformer(src_epsg: int, dst_epsg: int) -> Transformer:
+    """Get a (cached) `Transformer`, since creating the PROJ pipeline is slow."""
+    return Transformer.from_crs(src_epsg, dst_epsg, always_xy=True)
+
+
 def _nodata_to_zero(
     infile: Filename,
     outfile: Optional[Filename] = None,
@@ -504,22 +576,54 @@ def _nodata_to_zero(
         outfile = out_dir / (in_p.stem + "_tmp" + ext)
 
     ds_in = gdal.Open(fspath(infile))
-    drv = gdal.GetDriverByName(driver)
-    ds_out = drv.CreateCopy(fspath(outfile), ds_in, options=creation_options)
-
     bnd = ds_in.GetRasterBand(in_band)
-    nodata = bnd.GetNoDataValue()
-    arr = bnd.ReadAsArray()
-    # also make sure to replace NaNs, even if nodata is not set
-    mask = np.logical_or(np.isnan(arr), arr == nodata)
-    arr[mask] = 0
+    in_nodata = nodata = bnd.GetNoDataValue()
+    if nodata is not None and np.isnan(nodata):
+        # NaNs are always replaced, no need to compare against nodata
+        nodata = None
 
-    ds_out.GetRasterBand(1).WriteArray(arr)
-    ds_out = None
+    drv = gdal.GetDriverByName(driver)
+    ds_out = drv.Create(
+        fspath(outfile),
+        ds_in.RasterXSize,
+        ds_in.RasterYSize,
+        1,
+        bnd.DataType,
+        options=creation_options,
+    )
+    ds_out.SetGeoTransform(ds_in.GetGeoTransform())
+    ds_out.SetProjection(ds_in.GetProjection())
+    bnd_out = ds_out.GetRasterBand(1)
+    if in_nodata is not None:
+        bnd_out.SetNoDataValue(in_nodata)
+
+    # One pass over the native blocks of the input: each block is read once,
+    # zeroed, and written once, so we never hold the full raster in memory
+    for xoff, yoff, win_x, win_y in _get_block_windows(bnd):
+        arr = bnd.ReadAsArray(xoff, yoff, win_x, win_y)
+        # also make sure to replace NaNs, even if nodata is not set
+        np.putmask(arr, np.isnan(arr), 0)
+        if nodata is not None:
+            np.putmask(arr, arr == nodata, 0)
+        bnd_out.WriteArray(arr, xoff, yoff)
+
+    bnd_out.FlushCache()
+    ds_in = ds_out = None
 
     return outfile
 
 
+def _get_block_windows(band: gdal.Band):
+    """Iterate over the (xoff, yoff, xsize, ysize) windows of `band`'s blocks."""
+    xsize, ysize = band.XSize, band.YSize
+    block_x, block_y = band.GetBlockSize()
+    for yoff in range(0, ysize, block_y):
+        win_y = min(block_y, ysize - yoff)
+        for xoff in range(0, xsize, block_x):
+            win_x = min(block_x, xsize - xoff)
+            yield xoff, yoff, win_x, win_y
+
+
 def warp_to_match(
     input_file: Filename,
     match_file: Filename,
@@ -575,6 +679,10 @@ def warp_to_match(
         outputBounds=bounds,
         outputBoundsSRS=crs_wkt,
         resampleAlg=resample_alg,
+        # Overlap the reads with the warp computation, and split the warp kernel
+        # over threads (for a VRT output, these apply whenever it's read)
+        multithread=True,
+        warpOptions=_WARP_THREAD_OPTIONS,
     )
     gdal.Warp(
         fspath(output_file),
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import logging
+import math
+import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
 from os import fspath
 from pathlib import Path
 from typing import Optional, Union
@@ -17,13 +20,17 @@ from dolphin import io
 from dolphin._background import DummyProcessPoolExecutor
 from dolphin._log import get_log, log_runtime
 from dolphin._types import Filename
-from dolphin.utils import full_suffix, progress
+from dolphin.utils import full_suffix, get_cpu_count, progress, set_num_threads
 
 logger = get_log(__name__)
 
 gdal.UseExceptions()
 
 CONNCOMP_SUFFIX = ".unw.conncomp"
+# With `ntiles="auto"`, the largest tile side (in pixels) to give SNAPHU
+AUTO_TILE_SIZE = 2000
+# With `ntiles="auto"`, the overlap used if no `tile_overlap` is given
+AUTO_TILE_OVERLAP = (400, 400)
 
 
 @log_runtime
@@ -39,6 +46,9 @@ def run(
     unw_suffix: str = ".unw.tif",
     max_jobs: int = 1,
     downsample_factor: int = 1,
+    ntiles: Union[tuple[int, int], str] = (1, 1),
+    tile_overlap: tuple[int, int] = (0, 0),
+    n_parallel_tiles: Optional[int] = None,
     overwrite: bool = False,
     **kwargs,
 ) -> tuple[list[Path], list[Path]]:
@@ -65,9 +75,22 @@ def run(
         unwrapped file suffix to use for creating/searching for existing files.
     max_jobs : int, optional, default = 1
         Maximum parallel processes.
+        With more than one, the workers are started with "spawn", so a script
+        calling `run` must guard its entry point with `if __name__ == "__main__":`.
     downsample_factor : int, optional, default = 1
         (For running coarse_unwrap): Downsample the interferograms by this
         factor to unwrap faster, then upsample to full resolution.
+    ntiles : tuple[int, int] or "auto", optional, default = (1, 1)
+        (For SNAPHU): Number of (row, column) tiles to split each interferogram
+        into. With (1, 1), the full interferogram is unwrapped as one tile.
+        With "auto", uses tiles of at most `AUTO_TILE_SIZE` pixels per side.
+    tile_overlap : tuple[int, int], optional, default = (0, 0)
+        (For SNAPHU): Overlap, in pixels, between neighboring (row, column) tiles.
+    n_parallel_tiles : int, optional
+        (For SNAPHU): Maximum number of tiles to unwrap in parallel per
+        interferogram. Capped so that `max_jobs * n_parallel_tiles` does not
+        exceed the number of available CPUs.
+        Default is None, which uses all the CPUs not taken by the parallel files.
     overwrite : bool, optional, default = False
         Overwrite existing unwrapped files.
 
@@ -94,24 +117,57 @@ def run(
     all_out_files = [
         (output_path / Path(f).name).with_suffix(unw_suffix) for f in ifg_filenames
     ]
-    in_files, out_files = [], []
-    for inf, outf in zip(ifg_filenames, all_out_files):
-        if Path(outf).exists() and not overwrite:
-            logger.info(f"{outf} exists. Skipping.")
+    # List the output directory once instead of checking each file
+    try:
+        existing = {entry.name for entry in os.scandir(output_path)}
+    except FileNotFoundError:
+        existing = set()
+
+    in_files, out_files, in_cor_files = [], [], []
+    for inf, outf, cor_file in zip(ifg_filenames, all_out_files, cor_filenames):
+        if outf.name in existing and not overwrite:
+            logger.debug("%s exists. Skipping.", outf)
             continue
 
         in_files.append(inf)
         out_files.append(outf)
+        in_cor_files.append(cor_file)
+    num_skipped = len(all_out_files) - len(out_files)
+    if num_skipped:
+        logger.info(f"Skipping {num_skipped} existing unwrapped files")
     logger.info(f"{len(out_files)} left to unwrap")
+    conncomp_files = [
+        Path(str(outf).replace(unw_suffix, CONNCOMP_SUFFIX)) for outf in all_out_files
+    ]
+    if not out_files:
+        return all_out_files, conncomp_files
 
     if mask_file:
         mask_file = Path(mask_file).resolve()
         # TODO: include mask_file in snaphu
         # Make sure it's the right format with 1s and 0s for include/exclude
 
-    # This keeps it from spawning a new process for a single job.
-    Executor = ThreadPoolExecutor if max_jobs > 1 else DummyProcessPoolExecutor
-    with Executor(max_workers=max_jobs) as exc:
+    # The pre/post-processing around snaphu is GIL-bound Python/NumPy/GDAL work,
+    # so use processes (sized to the available cores) instead of threads.
+    # With fewer files than `max_jobs`, fewer workers leave more cores for tiles.
+    n_workers = min(max_jobs, get_cpu_count(), len(out_files))
+    # Split the CPU budget between parallel files and parallel tiles per file
+    max_tiles = max(1, get_cpu_count() // n_workers)
+    if n_parallel_tiles is None:
+        n_parallel_tiles = max_tiles
+    n_parallel_tiles = max(1, min(n_parallel_tiles, max_tiles))
+    if n_workers > 1:
+        # "spawn" so workers don't inherit GDAL/numba/journal state (or locks
+        # held by other threads) from a forked copy of this process
+        exc = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+        )
+    else:
+        # This keeps it from spawning a new process for a single job.
+        exc = DummyProcessPoolExecutor(max_workers=1)
+    with exc:
         futures = [
             exc.submit(
                 unwrap,
@@ -123,8 +179,11 @@ def run(
                 use_icu=use_icu,
                 mask_file=mask_file,
                 downsample_factor=downsample_factor,
+                ntiles=ntiles if isinstance(ntiles, str) else tuple(ntiles),
+                tile_overlap=tuple(tile_overlap),
+                n_parallel_tiles=n_parallel_tiles,
             )
-            for ifg_file, out_file, cor_file in zip(in_files, out_files, cor_filenames)
+            for ifg_file, out_file, cor_file in zip(in_files, out_files, in_cor_files)
         ]
         with progress() as p:
             for fut in p.track(
@@ -135,12 +194,18 @@ def run(
             ):
                 fut.result()
 
-    conncomp_files = [
-        Path(str(outf).replace(unw_suffix, CONNCOMP_SUFFIX)) for outf in all_out_files
-    ]
     return all_out_files, conncomp_files
 
 
+def _init_worker():
+    """Limit each worker process to one thread to avoid oversubscription.
+
+    numpy and numba are already imported by the time this runs, so the limit
+    goes through their runtime APIs (`set_num_threads`), not `OMP_NUM_THREADS`.
+    """
+    set_num_threads(1)
+
+
 def unwrap(
     ifg_filename: Filename,
     corr_filename: Filename,
@@ -150,9 +215,12 @@ def unwrap(
     zero_where_masked: bool = True,
     init_method: str = "mst",
     cost: str = "smooth",
-    log_snaphu_to_file: bool = True,
+    log_snaphu_to_file: bool = False,
     use_icu: bool = False,
     downsample_factor: int = 1,
+    ntiles: Union[tuple[int, int], str] = (1, 1),
+    tile_overlap: tuple[int, int] = (0, 0),
+    n_parallel_tiles: int = 1,
 ) -> tuple[Path, Path]:
     """Unwrap a single interferogram using isce3's SNAPHU/ICU bindings.
 
@@ -178,13 +246,25 @@ def unwrap(
     cost : str, choices = {"smooth", "defo", "p-norm",}
         SNAPHU cost function, by default "smooth"
     log_snaphu_to_file : bool, optional
-        Redirect SNAPHU's logging output to file, by default True
+        Redirect SNAPHU's logging output to file, by default False.
+        If False, SNAPHU's progress messages are not shown.
     use_icu : bool, optional, default = False
         Force the unwrapping to use ICU
     downsample_factor : int, optional, default = 1
         Downsample the interferograms by this factor to unwrap faster, then upsample
         to full resolution.
         If 1, doesn't use coarse_unwrap and unwraps as normal.
+    ntiles : tuple[int, int] or "auto", optional, default = (1, 1)
+        Number of (row, column) tiles to split the interferogram into for SNAPHU.
+        With (1, 1), the full interferogram is unwrapped as one tile.
+        With "auto", picks the number of tiles so each is at most
+        `AUTO_TILE_SIZE` pixels per side.
+        Ignored when using ICU.
+    tile_overlap : tuple[int, int], optional, default = (0, 0)
+        Overlap, in pixels, between neighboring (row, column) tiles.
+        If `ntiles="auto"` and no overlap is given, uses `AUTO_TILE_OVERLAP`.
+    n_parallel_tiles : int, optional, default = 1
+        Maximum number of tiles for SNAPHU to unwrap in parallel.
 
     Returns
     -------
@@ -198,6 +278,9 @@ def unwrap(
     On MacOS, the SNAPHU unwrapper doesn't work due to a MemoryMap bug.
     ICU is used instead.
     """
+    # Check this before creating any outputs, which `run` would skip next time
+    if isinstance(ntiles, str) and ntiles != "auto":
+        raise ValueError(f"Invalid ntiles {ntiles!r}: must be 'auto' or (rows, cols)")
     if downsample_factor > 1:
         return coarse_unwrap(
             ifg_filename,
@@ -216,21 +299,31 @@ def unwrap(
     use_snaphu = sys.platform != "darwin" and not use_icu
     Raster = isce3.io.gdal.Raster if use_snaphu else isce3.io.Raster
 
-    shape = io.get_raster_xysize(ifg_filename)[::-1]
-    corr_shape = io.get_raster_xysize(corr_filename)[::-1]
-    if shape != corr_shape:
-        raise ValueError(
-            f"correlation {corr_shape} and interferogram {shape} shapes don't match"
-        )
-    mask_shape = io.get_raster_xysize(mask_file)[::-1] if mask_file else None
-    if mask_file and shape != mask_shape:
-        raise ValueError(
-            f"Mask {mask_shape} and interferogram {shape} shapes don't match"
-        )
+    # Read the ifg's metadata once: this also caches it for the `io.write_arr`
+    # calls below, which create the outputs like the ifg
+    ifg_info = io._raster_info(ifg_filename)
+    shape = (ifg_info.ysize, ifg_info.xsize)
+    if ntiles == "auto":
+        ntiles = _get_auto_ntiles(shape)
+        if tuple(tile_overlap) == (0, 0) and ntiles != (1, 1):
+            tile_overlap = AUTO_TILE_OVERLAP
+        logger.debug(f"Using {ntiles} tiles with {tile_overlap} overlap")
 
     ifg_raster = Raster(fspath(ifg_filename))
     corr_raster = Raster(fspath(corr_filename))
     mask_raster = Raster(fspath(mask_file)) if mask_file else None
+    # Take the other shapes from the already-opened rasters instead of reopening
+    corr_shape = (corr_raster.length, corr_raster.width)
+    if shape != corr_shape:
+        raise ValueError(
+            f"correlation {corr_shape} and interferogram {shape} shapes don't match"
+        )
+    if mask_raster is not None:
+        mask_shape = (mask_raster.length, mask_raster.width)
+        if shape != mask_shape:
+            raise ValueError(
+                f"Mask {mask_shape} and interferogram {shape} shapes don't match"
+            )
     unw_suffix = full_suffix(unw_filename)
 
     # Get the driver based on the output file extension
@@ -271,70 +364,145 @@ def unwrap(
         unw_raster = Raster(fspath(unw_filename), True)
         conncomp_raster = Raster(fspath(conncomp_filename), True)
 
-    if log_snaphu_to_file and use_snaphu:
-        _redirect_snaphu_log(unw_filename)
-
-    if zero_where_masked and mask_file is not None:
-        logger.info(f"Zeroing phase/corr of pixels masked in {mask_file}")
-        zeroed_ifg_file, zeroed_corr_file = _zero_from_mask(
-            ifg_filename, corr_filename, mask_file
-        )
-        corr_raster = Raster(fspath(zeroed_corr_file))
-        ifg_raster = Raster(fspath(zeroed_ifg_file))
-
-    logger.info(
-        f"Unwrapping size {(ifg_raster.length, ifg_raster.width)} {ifg_filename} to"
-        f" {unw_filename} using {'SNAPHU' if use_snaphu else 'ICU'}"
-    )
     if use_snaphu:
-        snaphu.unwrap(
-            unw_raster,
-            conncomp_raster,
-            ifg_raster,
-            corr_raster,
-            nlooks=nlooks,
-            cost=cost,
-            init_method=init_method,
-            mask=mask_raster,
+        _redirect_snaphu_log(unw_filename if log_snaphu_to_file else None)
+
+    zeroed_files: tuple[Path, ...] = ()
+    try:
+        if zero_where_masked and mask_file is not None:
+            logger.info(f"Zeroing phase/corr of pixels masked in {mask_file}")
+            zeroed_files = _get_zeroed_filenames(unw_filename)
+            _zero_from_mask(ifg_filename, corr_filename, mask_file, *zeroed_files)
+            ifg_raster = Raster(fspath(zeroed_files[0]))
+            corr_raster = Raster(fspath(zeroed_files[1]))
+
+        logger.info(
+            f"Unwrapping size {(ifg_raster.length, ifg_raster.width)} {ifg_filename}"
+            f" to {unw_filename} using {'SNAPHU' if use_snaphu else 'ICU'}"
         )
-    else:
-        # Snaphu will fail on Mac OS due to a MemoryMap bug. Use ICU instead.
-        # TODO: Should we zero out the correlation data using the mask,
-        # since ICU doesn't support masking?
-
-        icu = ICU(buffer_lines=shape[0])
-        icu.unwrap(
-            unw_raster,
-            conncomp_raster,
-            ifg_raster,
-            corr_raster,
-        )
-    del unw_raster, conncomp_raster
+        if use_snaphu:
+            snaphu.unwrap(
+                unw_raster,
+                conncomp_raster,
+                ifg_raster,
+                corr_raster,
+                nlooks=nlooks,
+                cost=cost,
+                init_method=init_method,
+                mask=mask_raster,
+                tiling_params=_get_tiling_params(
+                    ntiles, tile_overlap, n_parallel_tiles  # type: ignore[arg-type]
+                ),
+            )
+        else:
+            # Snaphu will fail on Mac OS due to a MemoryMap bug. Use ICU instead.
+            # TODO: Should we zero out the correlation data using the mask,
+            # since ICU doesn't support masking?
+
+            icu = ICU(buffer_lines=shape[0])
+            icu.unwrap(
+                unw_raster,
+                conncomp_raster,
+                ifg_raster,
+                corr_raster,
+            )
+    finally:
+        # Close every raster (flushing the outputs) before removing the zeroed
+        # copies, which were only inputs for this unwrapping, even on failure
+        unw_raster = conncomp_raster = None
+        ifg_raster = corr_raster = mask_raster = None
+        for f in zeroed_files:
+            f.unlink(missing_ok=True)
     return Path(unw_filename), Path(conncomp_filename)
 
 
+def _get_tiling_params(
+    ntiles: tuple[int, int], tile_overlap: tuple[int, int], n_parallel_tiles: int
+) -> Optional[snaphu.TilingParams]:
+    """Get the SNAPHU tiling parameters, or None to unwrap as a single tile."""
+    nrows, ncols = ntiles
+    if nrows * ncols == 1:
+        return None
+    return snaphu.TilingParams(
+        nproc=min(n_parallel_tiles, nrows * ncols),
+        tile_nrows=nrows,
+        tile_ncols=ncols,
+        row_overlap=tile_overlap[0],
+        col_overlap=tile_overlap[1],
+        # Re-optimize the assembled result as one tile to remove tile seams
+        single_tile_reoptimize=True,
+    )
+
+
+def _get_auto_ntiles(
+    shape: tuple[int, int], max_tile_size: int = AUTO_TILE_SIZE
+) -> tuple[int, int]:
+    """Get the (row, column) number of tiles with sides <= `max_tile_size`."""
+    nrows, ncols = shape
+    return (math.ceil(nrows / max_tile_size), math.ceil(ncols / max_tile_size))
+
+
+def _get_zeroed_filenames(unw_filename: Filename) -> tuple[Path, Path]:
+    # Name the copies after the (unique) output, not the input, so that jobs
+    # sharing an input can't collide, and the inputs' directory stays untouched
+    unw_path = Path(unw_filename)
+    return (
+        unw_path.with_name(f"{unw_path.stem}.zeroed.int.tif"),
+        unw_path.with_name(f"{unw_path.stem}.zeroed.cor.tif"),
+    )
+
+
 def _zero_from_mask(
-    ifg_filename: Filename, corr_filename: Filename, mask_filename: Filename
+    ifg_filename: Filename,
+    corr_filename: Filename,
+    mask_filename: Filename,
+    zeroed_ifg_file: Filename,
+    zeroed_corr_file: Filename,
 ) -> tuple[Path, Path]:
-    zeroed_ifg_file = Path(ifg_filename).with_suffix(".zeroed.tif")
-    zeroed_corr_file = Path(corr_filename).with_suffix(".zeroed.cor.tif")
 
-    mask = io.load_gdal(mask_filename)
+    # Decode (and compress) the strips on multiple threads, like `io.load_gdal`
+    with io._gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+        ds_mask = gdal.Open(fspath(mask_filename))
+    bnd_mask = ds_mask.GetRasterBand(1)
     for in_f, out_f in zip(
         [ifg_filename, corr_filename], [zeroed_ifg_file, zeroed_corr_file]
     ):
-        arr = io.load_gdal(in_f)
-        arr[mask == 0] = 0
-        logger.debug(f"Size: {arr.size}, {(arr != 0).sum()} non-zero pixels")
         io.write_arr(
-            arr=arr,
+            arr=None,
             output_name=out_f,
             like_filename=corr_filename,
+            dtype=io.get_raster_dtype(in_f),
         )
-    return zeroed_ifg_file, zeroed_corr_file
-
-
-@njit(nogil=True)
+        with io._gdal_config_option("GDAL_NUM_THREADS", "ALL_CPUS"):
+            ds_in = gdal.Open(fspath(in_f))
+            ds_out = gdal.Open(fspath(out_f), gdal.GA_Update)
+        bnd_in = ds_in.GetRasterBand(1)
+        bnd_out = ds_out.GetRasterBand(1)
+        xsize, ysize = bnd_out.XSize, bnd_out.YSize
+        # Stream through rows of whole output tiles, so we never hold the full
+        # rasters (or the mask) in memory and each tile is written once
+        nrows = bnd_out.GetBlockSize()[1]
+        num_nonzero = 0
+        # Counting is an extra pass over each block, only needed for the log
+        log_nonzero = logger.isEnabledFor(logging.DEBUG)
+        for yoff in range(0, ysize, nrows):
+            cur_rows = min(nrows, ysize - yoff)
+            arr = bnd_in.ReadAsArray(0, yoff, xsize, cur_rows)
+            mask = bnd_mask.ReadAsArray(0, yoff, xsize, cur_rows)
+            arr[mask == 0] = 0
+            if log_nonzero:
+                num_nonzero += np.count_nonzero(arr)
+            bnd_out.WriteArray(arr, 0, yoff)
+        if log_nonzero:
+            logger.debug(f"Size: {xsize * ysize}, {num_nonzero} non-zero pixels")
+        ds_in = ds_out = bnd_in = bnd_out = None
+
+    ds_mask = bnd_mask = None
+    return Path(zeroed_ifg_file), Path(zeroed_corr_file)
+
+
+# Cached: compiling the stencil takes longer than running it on most rasters
+@njit(nogil=True, cache=True)
 def compute_phase_diffs(phase):
     """Compute the total number phase jumps > pi between adjacent pixels.
 
@@ -365,11 +533,16 @@ def _compute_phase_diffs(phase):
     return round(d1 - 0.5) + round(d2 - 0.5)
 
 
-def _redirect_snaphu_log(unw_filename: Filename):
+def _redirect_snaphu_log(unw_filename: Optional[Filename]):
+    """Send SNAPHU's progress messages next to `unw_filename`, or drop them if None."""
     import journal
 
+    channel = journal.info("isce3.unwrap.snaphu")
+    channel.active = unw_filename is not None
+    if unw_filename is None:
+        return
     logfile = Path(unw_filename).with_suffix(".log")
-    journal.info("isce3.unwrap.snaphu").device = journal.logfile(fspath(logfile), "w")
+    channel.device = journal.logfile(fspath(logfile), "w")
     logger.info(f"Logging snaphu output to {logfile}")
 
 
@@ -383,7 +556,7 @@ def coarse_unwrap(
     zero_where_masked: bool = True,
     init_method: str = "mst",
     cost: str = "smooth",
-    log_snaphu_to_file: bool = True,
+    log_snaphu_to_file: bool = False,
 ) -> tuple[Path, Path]:
     """Unwrap an interferogram using a coarse resolution unwrapped interferogram.
 
@@ -411,7 +584,8 @@ def coarse_unwrap(
     cost : str, choices = {"smooth", "defo", "p-norm",}
         SNAPHU cost function, by default "smooth"
     log_snaphu_to_file : bool, optional
-        Redirect SNAPHU's logging output to file, by default True
+        Redirect SNAPHU's logging output to file, by default False.
+        If False, SNAPHU's progress messages are not shown.
 
     Returns
     -------
@@ -431,19 +605,17 @@ def coarse_unwrap(
     igram = io.load_gdal(ifg_filename)
     coherence = io.load_gdal(corr_filename)
     if mask_file is not None:
-        # https://github.com/python/mypy/issues/5107
-        mask = _load_mask(mask_file)  # type: ignore
+        bad_pixels = io.load_gdal(mask_file) == 0
         # Set correlation to 0 where mask is 0
-        coherence[mask == 0] = 0
+        coherence[bad_pixels] = 0
         if zero_where_masked:
-            igram[mask == 0] = 0
+            igram[bad_pixels] = 0
 
     unwrap_callback = SnaphuUnwrap(
         cost=cost,
         init_method=init_method,
     )
-    if log_snaphu_to_file:
-        _redirect_snaphu_log(unw_filename)
+    _redirect_snaphu_log(unw_filename if log_snaphu_to_file else None)
 
     unwrapped_phase_lores, conncomp_lores = coarse_unwrap(
         igram=igram,
@@ -468,9 +640,3 @@ def coarse_unwrap(
         driver="ENVI",
     )
     return Path(unw_filename), Path(conncomp_filename)
-
-
-# make a cached version of loading the mask file
-@lru_cache
-def _load_mask(mask_file: Filename):
-    return io.load_gdal(mask_file)
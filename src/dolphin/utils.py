@@ -7,6 +7,7 @@ import re
 import resource
 import sys
 import warnings
+from functools import lru_cache
 from multiprocessing import cpu_count
 from pathlib import Path
 from typing import Iterable, Optional, Union
@@ -85,8 +86,11 @@ def numpy_to_gdal_type(np_dtype: DTypeLike) -> int:
         If `np_dtype` is not a numpy dtype, or if the provided dtype is not
         supported by GDAL (for example, `np.dtype('>i4')`)
     """
-    np_dtype = np.dtype(np_dtype)
+    return _numpy_to_gdal_type(np.dtype(np_dtype))
 
+
+@lru_cache(maxsize=None)
+def _numpy_to_gdal_type(np_dtype: np.dtype) -> int:
     if np.issubdtype(bool, np_dtype):
         return gdalconst.GDT_Byte
     gdal_code = gdal_array.NumericTypeCodeToGDALTypeCode(np_dtype)
@@ -95,6 +99,7 @@ def numpy_to_gdal_type(np_dtype: DTypeLike) -> int:
     return gdal_code
 
 
+@lru_cache(maxsize=None)
 def gdal_to_numpy_type(gdal_type: Union[str, int]) -> np.dtype:
     """Convert gdal type to numpy type."""
     if isinstance(gdal_type, str):
@@ -9,12 +9,14 @@ References
 from __future__ import annotations
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from os import fspath
 from pathlib import Path
 from typing import Optional
 
-from osgeo_utils import gdal_calc
+import numpy as np
+from osgeo import gdal
 
 from dolphin import io
 from dolphin._log import get_log
@@ -28,6 +30,8 @@ logger = get_log(__name__)
 
 __all__ = ["run_wrapped_phase_sequential"]
 
+_MAX_MOVE_WORKERS = 16
+
 
 def run_wrapped_phase_sequential(
     *,
@@ -68,8 +72,8 @@ def run_wrapped_phase_sequential(
     ministack_starts = range(0, len(file_list_all), ministack_size)
     for mini_idx, full_stack_idx in enumerate(ministack_starts):
         cur_slice = slice(full_stack_idx, full_stack_idx + ministack_size)
-        cur_files = file_list_all[cur_slice].copy()
-        cur_dates = date_list_all[cur_slice].copy()
+        cur_files = file_list_all[cur_slice]
+        cur_dates = date_list_all[cur_slice]
 
         # Make the current ministack output folder using the start/end dates
         d0 = cur_dates[0][0]
@@ -123,35 +127,72 @@ def run_wrapped_phase_sequential(
     # Average the temporal coherence files in each ministack
     # TODO: do we want to include the date span in this filename?
     output_tcorr_file = output_folder / "tcorr_average.tif"
-    # we can pass the list of files to gdal_calc, which interprets it
-    # as a multi-band file
     if len(tcorr_files) > 1:
         logger.info(f"Averaging temporal coherence files into: {output_tcorr_file}")
-        gdal_calc.Calc(
-            NoDataValue=0,
-            format="GTiff",
-            outfile=fspath(output_tcorr_file),
-            type="Float32",
-            quiet=True,
-            overwrite=True,
-            creation_options=io.DEFAULT_TIFF_OPTIONS,
-            A=tcorr_files,
-            calc="numpy.nanmean(A, axis=0)",
-        )
+        _average_files(tcorr_files, output_tcorr_file)
     else:
         tcorr_files[0].rename(output_tcorr_file)
 
     # Combine the separate SLC output lists into a single list
     all_slc_files = list(chain.from_iterable(output_slc_files.values()))
 
-    pl_outputs = []
-    for slc_fname in all_slc_files:
-        slc_fname.rename(output_folder / slc_fname.name)
-        pl_outputs.append(output_folder / slc_fname.name)
-
-    comp_outputs = []
-    for p in comp_slc_files:
-        p.rename(output_folder / p.name)
-        comp_outputs.append(output_folder / p.name)
+    pl_outputs = _move_files(all_slc_files, output_folder)
+    comp_outputs = _move_files(comp_slc_files, output_folder)
 
     return pl_outputs, comp_outputs, output_tcorr_file
+
+
+def _move_files(file_list: list[Path], output_folder: Path) -> list[Path]:
+    """Move each file into `output_folder`, keeping its name.
+
+    The renames wait on the filesystem, not the GIL, so a few threads hide
+    the per-file latency on network filesystems (NFS, Lustre).
+    """
+    out_files = [output_folder / f.name for f in file_list]
+    with ThreadPoolExecutor(max_workers=_MAX_MOVE_WORKERS) as exc:
+        list(exc.map(Path.replace, file_list, out_files))
+    return out_files
+
+
+def _average_files(
+    file_list: list[Path], output_file: Filename, nodata: float = 0
+) -> None:
+    """Stream `np.nanmean` across the rasters in `file_list` into `output_file`.
+
+    Reads one row of output tiles from every file at a time, so memory stays at
+    about `len(file_list)` strips instead of the full stack.
+    A pixel is set to `nodata` if it is nodata in any input, or NaN in all of them.
+    """
+    io.write_arr(
+        arr=None,
+        like_filename=file_list[0],
+        output_name=output_file,
+        dtype=np.float32,
+        nodata=nodata,
+    )
+    ds_in = [gdal.Open(fspath(f)) for f in file_list]
+    bands_in = [ds.GetRasterBand(1) for ds in ds_in]
+    nodatas = [io.get_raster_nodata(f) for f in file_list]
+    ds_out = gdal.Open(fspath(output_file), gdal.GA_Update)
+    bnd_out = ds_out.GetRasterBand(1)
+    xsize, ysize = bnd_out.XSize, bnd_out.YSize
+    nrows = bnd_out.GetBlockSize()[1]
+    for yoff in range(0, ysize, nrows):
+        cur_rows = min(nrows, ysize - yoff)
+        total = np.zeros((cur_rows, xsize), dtype=np.float64)
+        count = np.zeros((cur_rows, xsize), dtype=np.int32)
+        is_nodata = np.zeros((cur_rows, xsize), dtype=bool)
+        for bnd, nd in zip(bands_in, nodatas):
+            arr = bnd.ReadAsArray(0, yoff, xsize, cur_rows).astype(
+                np.float32, copy=False
+            )
+            if nd is not None:
+                is_nodata |= arr == nd
+            valid = ~np.isnan(arr)
+            total[valid] += arr[valid]
+            count += valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = (total / count).astype(np.float32)
+        out[is_nodata | (count == 0)] = nodata
+        bnd_out.WriteArray(out, 0, yoff)
+    ds_out = bnd_out = ds_in = bands_in = None
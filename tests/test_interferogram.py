@@ -208,6 +208,17 @@ def test_manual_indexes(tmp_path, four_slc_files):
     ]
 
 
+def test_network_to_single_vrt(tmp_path, four_slc_files):
+    n = Network(four_slc_files, max_bandwidth=1, outdir=tmp_path)
+    vrt_path = n.to_single_vrt(tmp_path / "all_ifgs.vrt")
+
+    assert io.get_raster_xysize(vrt_path) == io.get_raster_xysize(four_slc_files[0])
+    arr = io.load_gdal(vrt_path)
+    assert arr.shape[0] == len(n)
+    for k, ifg in enumerate(n):
+        npt.assert_allclose(arr[k], ifg.load(), rtol=1e-6)
+
+
 @pytest.fixture
 def expected_3x3_cor():
     # the edges will be less than 1 because of the windowing
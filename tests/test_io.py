@@ -3,6 +3,7 @@ from pathlib import Path
 import numpy as np
 import numpy.testing as npt
 import pytest
+from osgeo import gdal
 
 import dolphin._blocks
 from dolphin import io
@@ -42,6 +43,37 @@ def test_load_slices(raster_100_by_200):
     npt.assert_allclose(block, arr[10:20, 10:20])
 
 
+@pytest.mark.parametrize("interleave", ["BSQ", "BIL", "BIP"])
+def test_load_envi_memmap(tmp_path, interleave):
+    filename = str(tmp_path / "test.bin")
+    data = np.random.randn(3, 20, 30).astype(np.float32)
+    ds = gdal.GetDriverByName("ENVI").Create(
+        filename, 30, 20, 3, gdal.GDT_Float32, options=[f"INTERLEAVE={interleave}"]
+    )
+    ds.WriteArray(data)
+    ds = None
+
+    npt.assert_array_equal(io.load_gdal(filename), data)
+    block = io.load_gdal(filename, band=2, rows=slice(5, 10), cols=slice(3, 30))
+    npt.assert_array_equal(block, data[1, 5:10, 3:30])
+    # Changing the loaded array should not change the file
+    block[:] = 0
+    npt.assert_array_equal(io.load_gdal(filename, band=2), data[1])
+
+
+def test_load_envi_overwritten(tmp_path):
+    filename = str(tmp_path / "test.bin")
+    data = np.random.randn(20, 30).astype(np.float32)
+    io.write_arr(arr=data, output_name=filename, driver="ENVI")
+    arr = io.load_gdal(filename)
+    assert type(arr) is np.ndarray
+
+    # Overwriting the file after loading shouldn't change the loaded array
+    io.write_arr(arr=np.zeros_like(data), output_name=filename, driver="ENVI")
+    npt.assert_array_equal(arr, data)
+    npt.assert_array_equal(io.load_gdal(filename), 0)
+
+
 def test_load_none_slices(raster_100_by_200):
     arr = io.load_gdal(raster_100_by_200)
     block = io.load_gdal(raster_100_by_200, rows=slice(0, 10), cols=slice(None))
@@ -108,6 +140,29 @@ def test_get_raster_bounds(slc_file_list_nc_wgs84):
     assert bnds == expected
 
 
+def test_apply_gt_rotated():
+    # With a rotation term, `y` must use the original `x`, not the transformed one
+    gt = (100.0, 2.0, 0.5, 50.0, 0.25, -3.0)
+    x, y = io._apply_gt(gt=gt, x=4, y=10)
+    assert x == 100.0 + 4 * 2.0 + 10 * 0.5
+    assert y == 50.0 + 4 * 0.25 + 10 * -3.0
+
+    # Arrays give the same results as scalars
+    xs, ys = io._apply_gt(gt=gt, x=[4, 0], y=[10, 0])
+    npt.assert_allclose(xs, [x, 100.0])
+    npt.assert_allclose(ys, [y, 50.0])
+
+
+def test_xy_to_rowcol_batch(raster_100_by_200):
+    rows = np.array([0, 5, 99])
+    cols = np.array([0, 17, 199])
+    xs, ys = io.rowcol_to_xy(rows, cols, filename=raster_100_by_200)
+    out_rows, out_cols = io.xy_to_rowcol(xs, ys, filename=raster_100_by_200)
+    npt.assert_array_equal(out_rows, rows)
+    npt.assert_array_equal(out_cols, cols)
+    assert io.xy_to_rowcol(xs[1], ys[1], filename=raster_100_by_200) == (5, 17)
+
+
 def test_write_arr_like(raster_100_by_200, tmpdir):
     arr = io.load_gdal(raster_100_by_200)
 
@@ -209,6 +264,40 @@ def test_save_block(raster_100_by_200, tmpdir):
     npt.assert_array_almost_equal(block_loaded2, arr)
 
 
+def test_writer(raster_100_by_200, tmpdir):
+    save_name = tmpdir / "writer.tif"
+    io.write_arr(arr=None, like_filename=raster_100_by_200, output_name=save_name)
+
+    writer = io.Writer()
+    writer.queue_write(np.ones((20, 30)), save_name, 0, 0)
+    writer.queue_write(2 * np.ones((20, 30)), save_name, 20, 30)
+    writer.notify_finished()
+
+    expected = np.zeros((100, 200))
+    expected[:20, :30] = 1
+    expected[20:40, 30:60] = 2
+    npt.assert_array_almost_equal(io.load_gdal(save_name), expected)
+
+
+def test_writer_hdf5(tmp_path):
+    import h5py
+
+    save_name = tmp_path / "writer.h5"
+    with h5py.File(save_name, "w") as hf:
+        hf.create_dataset("data", shape=(100, 200), dtype="float32", chunks=(32, 32))
+
+    writer = io.Writer()
+    writer.queue_write(np.ones((20, 30)), save_name, 0, 0)
+    writer.queue_write(2 * np.ones((20, 30)), save_name, 20, 30)
+    writer.notify_finished()
+
+    expected = np.zeros((100, 200))
+    expected[:20, :30] = 1
+    expected[20:40, 30:60] = 2
+    with h5py.File(save_name) as hf:
+        npt.assert_array_equal(hf["data"][()], expected)
+
+
 @pytest.fixture
 def cpx_arr(shape=(100, 200)):
     rng = np.random.default_rng()
@@ -346,6 +435,24 @@ def test_iter_blocks_rowcols(tiled_raster_100_by_200):
     loader.notify_finished()
 
 
+def test_iter_blocks_io_workers(tiled_raster_100_by_200):
+    loader = io.EagerLoader(filename=tiled_raster_100_by_200, block_shape=(32, 32))
+    expected_blocks, expected_slices = zip(*list(loader.iter_blocks()))
+
+    loader = io.EagerLoader(
+        filename=tiled_raster_100_by_200,
+        block_shape=(32, 32),
+        queue_size=2,
+        io_workers=3,
+    )
+    blocks, slices = zip(*list(loader.iter_blocks()))
+    assert not loader._thread.is_alive()
+    # Same blocks, in the same order
+    assert slices == expected_slices
+    for b, expected in zip(blocks, expected_blocks):
+        npt.assert_array_equal(b, expected)
+
+
 def test_iter_nodata(
     raster_with_nan,
     raster_with_nan_block,
@@ -384,6 +491,20 @@ def test_iter_nodata(
     assert len(blocks) == expected_num_blocks - 1
 
 
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64])
+def test_is_all_nodata(dtype):
+    arr = np.full((2, 10, 10), np.nan, dtype=dtype)
+    assert io._is_all_nodata(arr, np.nan)
+    # Non-contiguous views should work too
+    assert io._is_all_nodata(arr[:, ::2, 1:], np.nan)
+    arr[1, 5, 5] = 1
+    assert not io._is_all_nodata(arr, np.nan)
+
+    zeros = np.zeros((10, 10), dtype=dtype)
+    assert io._is_all_nodata(zeros, 0.0)
+    assert not io._is_all_nodata(zeros, np.nan)
+
+
 @pytest.mark.skip
 def test_iter_blocks_nodata_mask(tiled_raster_100_by_200):
     # load one block at a time
@@ -1,4 +1,5 @@
 import numpy as np
+import numpy.testing as npt
 import pytest
 from osgeo import gdal
 
@@ -36,6 +37,43 @@ def test_ps_nodata(slc_stack):
     assert not ps_pixels[0, 0]
 
 
+def test_nan_mean_std_count(slc_stack):
+    mag = np.abs(slc_stack)
+    mag[:2, 0, 0] = np.nan
+    mag[:, 1, 1] = np.nan
+    mean, std_dev, count = dolphin.ps._nan_mean_std_count(mag)
+    with pytest.warns(RuntimeWarning):
+        np.testing.assert_allclose(mean, np.nanmean(mag, axis=0), rtol=1e-6)
+        np.testing.assert_allclose(std_dev, np.nanstd(mag, axis=0), rtol=1e-5)
+    np.testing.assert_array_equal(count, np.count_nonzero(~np.isnan(mag), axis=0))
+
+    # Passing the complex data should give the same result as the magnitude
+    cpx = slc_stack.copy()
+    cpx[:2, 0, 0] = np.nan
+    cpx[:, 1, 1] = np.nan
+    for expected, result in zip(
+        (mean, std_dev, count), dolphin.ps._nan_mean_std_count(cpx)
+    ):
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+
+def test_nan_mean_std_count_bright_stable():
+    # Bright pixels with a small spread: a naive `sumsq / n - mean**2` in
+    # float32 cancels away most of the std. dev.
+    rng = np.random.default_rng(1234)
+    shape = (30, 20, 25)
+    amp = 1e4 + rng.normal(scale=0.85, size=shape)
+    phase = rng.uniform(-np.pi, np.pi, size=shape)
+    stack = (amp * np.exp(1j * phase)).astype(np.complex64)
+    stack[3, 0, 0] = np.nan
+
+    mean, std_dev, count = dolphin.ps._nan_mean_std_count(stack)
+    mag = np.abs(stack).astype(np.float64)
+    np.testing.assert_allclose(mean, np.nanmean(mag, axis=0), rtol=1e-6)
+    np.testing.assert_allclose(std_dev, np.nanstd(mag, axis=0), rtol=1e-2)
+    assert count[0, 0] == shape[0] - 1
+
+
 def test_ps_threshold(slc_stack):
     _, _, ps_pixels = dolphin.ps.calc_ps_block(
         np.abs(slc_stack),
@@ -71,6 +109,80 @@ def test_create_ps(tmp_path, vrt_stack):
     assert io.get_raster_dtype(amp_dispersion_file) == np.float32
 
 
+def test_create_ps_io_workers(tmp_path, vrt_stack):
+    outputs = []
+    for io_workers in [1, 3]:
+        d = tmp_path / f"workers_{io_workers}"
+        d.mkdir()
+        files = (d / "ps_pixels.tif", d / "amp_disp.tif", d / "amp_mean.tif")
+        dolphin.ps.create_ps(
+            slc_vrt_file=vrt_stack.outfile,
+            output_file=files[0],
+            output_amp_dispersion_file=files[1],
+            output_amp_mean_file=files[2],
+            block_shape=(5, 5),
+            io_workers=io_workers,
+        )
+        outputs.append([io.load_gdal(f) for f in files])
+    # Concurrent reads give the same blocks, so the same outputs
+    for serial, threaded in zip(*outputs):
+        npt.assert_array_equal(serial, threaded)
+
+
+def test_create_ps_num_slcs(tmp_path, vrt_stack):
+    amp_dispersion_file = tmp_path / "amp_disp.tif"
+    amp_mean_file = tmp_path / "amp_mean.tif"
+    dolphin.ps.create_ps(
+        slc_vrt_file=vrt_stack.outfile,
+        output_amp_dispersion_file=amp_dispersion_file,
+        output_amp_mean_file=amp_mean_file,
+        output_file=tmp_path / "ps_pixels.tif",
+    )
+    assert dolphin.ps._get_num_slcs(amp_dispersion_file) == len(vrt_stack)
+
+    # Updating with the same stack again should count its SLCs twice
+    dolphin.ps.create_ps(
+        slc_vrt_file=vrt_stack.outfile,
+        output_amp_dispersion_file=tmp_path / "amp_disp2.tif",
+        output_amp_mean_file=tmp_path / "amp_mean2.tif",
+        output_file=tmp_path / "ps_pixels2.tif",
+        existing_amp_dispersion_file=amp_dispersion_file,
+        existing_amp_mean_file=amp_mean_file,
+        update_existing=True,
+    )
+    assert dolphin.ps._get_num_slcs(tmp_path / "amp_disp2.tif") == 2 * len(vrt_stack)
+    # Repeating the same data doesn't change the mean or std. dev.
+    npt.assert_allclose(
+        io.load_gdal(tmp_path / "amp_mean2.tif"), io.load_gdal(amp_mean_file), rtol=1e-5
+    )
+
+
+def test_update_ps_block(slc_stack):
+    n_existing = 4
+    mean, amp_disp, _ = dolphin.ps.calc_ps_block(
+        slc_stack[:n_existing], min_count=n_existing
+    )
+    # Mark one pixel as nodata in the existing files
+    mean[0, 0] = amp_disp[0, 0] = 0
+    new_mean, new_amp_disp, new_ps = dolphin.ps._update_ps_block(
+        slc_stack[n_existing:],
+        existing_mean=mean,
+        existing_amp_dispersion=amp_disp,
+        n_existing=n_existing,
+        amp_dispersion_threshold=0.25,
+    )
+    expected = dolphin.ps.calc_ps_block(slc_stack, min_count=len(slc_stack))
+    npt.assert_allclose(new_mean[1:], expected[0][1:], rtol=1e-5)
+    npt.assert_allclose(new_amp_disp[1:], expected[1][1:], rtol=1e-5)
+    npt.assert_array_equal(new_ps[1:], expected[2][1:])
+
+    # The nodata pixel only uses the new SLCs
+    only_new = dolphin.ps.calc_ps_block(
+        slc_stack[n_existing:], min_count=len(slc_stack) - n_existing
+    )
+    npt.assert_allclose(new_mean[0, 0], only_new[0][0, 0])
+
+
 @pytest.fixture
 def vrt_stack_with_nans(tmp_path, raster_with_nan_block):
     vrt_file = tmp_path / "test_with_nans.vrt"
@@ -86,6 +198,56 @@ def _write_zeros(file, shape):
     ds = bnd = None
 
 
+def test_default_block_shape(vrt_stack):
+    # The test SLCs are untiled GeoTIFFs, so blocks should span all columns
+    nrows, ncols = vrt_stack.shape[-2:]
+    block_shape = dolphin.ps._get_default_block_shape(vrt_stack)
+    assert block_shape == (nrows, ncols)
+
+    block_shape = dolphin.ps._get_default_block_shape(vrt_stack, max_bytes=1)
+    assert block_shape[1] == ncols
+
+
+@pytest.mark.parametrize(
+    "driver, options, suffix",
+    [
+        ("GTiff", ["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"], ".tif"),
+        ("ENVI", [], ".slc"),
+    ],
+)
+def test_default_block_shape_layout(tmp_path, driver, options, suffix):
+    nrows, ncols = 40, 64
+    file_list = []
+    for i in range(3):
+        fname = tmp_path / f"2022010{i + 1}{suffix}"
+        ds = gdal.GetDriverByName(driver).Create(
+            str(fname), ncols, nrows, 1, gdal.GDT_CFloat32, options=options
+        )
+        ds.GetRasterBand(1).Fill(1)
+        ds = None
+        file_list.append(fname)
+    vrt_stack = VRTStack(file_list, outfile=tmp_path / "stack.vrt")
+
+    block_shape = dolphin.ps._get_default_block_shape(vrt_stack)
+    small_block_shape = dolphin.ps._get_default_block_shape(vrt_stack, max_bytes=1)
+    if driver == "GTiff":
+        # Tiled files keep the 2D blocks
+        assert block_shape == small_block_shape == (512, 512)
+    else:
+        # ENVI files are stored in single-line strips: use full-width blocks,
+        # of at least 16 lines
+        assert block_shape == (nrows, ncols)
+        assert small_block_shape == (16, ncols)
+
+
+def test_fast_clone(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"\x01\x02" * 1000)
+    dst = tmp_path / "dst.bin"
+    dolphin.ps._fast_clone(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+
+
 def test_multilook_ps_file(tmp_path, vrt_stack):
     ps_mask_file = tmp_path / "ps_pixels.tif"
 
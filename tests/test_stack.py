@@ -178,6 +178,17 @@ def test_iter_blocks(vrt_stack):
         assert b.shape == (len(vrt_stack), 1, 2)
 
 
+def test_iter_blocks_io_workers(tmp_path, tiled_file_list):
+    vrt_stack = VRTStack(tiled_file_list, outfile=tmp_path / "stack.vrt")
+    expected = list(vrt_stack.iter_blocks(block_shape=(32, 32)))
+    threaded = list(
+        vrt_stack.iter_blocks(block_shape=(32, 32), queue_size=2, io_workers=3)
+    )
+    assert [s for _, s in threaded] == [s for _, s in expected]
+    for (b, _), (expected_b, _) in zip(threaded, expected):
+        npt.assert_array_equal(b, expected_b)
+
+
 def test_tiled_iter_blocks(tmp_path, tiled_file_list):
     outfile = tmp_path / "stack.vrt"
     vrt_stack = VRTStack(tiled_file_list, outfile=outfile)
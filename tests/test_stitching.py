@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 from make_netcdf import create_test_nc
 from pyproj import CRS
@@ -92,3 +93,64 @@ def test_get_mode_projection(slc_file_list_nc, slc_file_list_nc_wgs84):
         slc_file_list_nc[0:1] + slc_file_list_nc_wgs84[0:2],
     )
     assert CRS.from_user_input(p) == epsg4326
+
+
+def test_merge_images(tmp_path):
+    shape = (10, 10)
+    file_list = []
+    for i in range(2):
+        fname = tmp_path / f"shifted_{20220101 + i}.nc"
+        data = np.full(shape, i + 1, dtype=np.float32)
+        create_test_nc(fname, epsg=4326, subdir="/", data=data, xoff=i, yoff=i)
+        file_list.append(fname)
+
+    outfile = tmp_path / "merged.tif"
+    stitching.merge_images(
+        file_list,
+        outfile=outfile,
+        driver="GTiff",
+        target_aligned_pixels=False,
+        options=None,
+    )
+    assert io.get_raster_bounds(outfile) == (-5.5, -4.5, 5.5, 6.5)
+    merged = io.load_gdal(outfile)
+    assert merged.shape == (11, 11)
+    # The later file is on top where they overlap
+    assert merged[0, -1] == 2
+    assert merged[-1, 0] == 1
+    assert merged[5, 5] == 2
+    # Corners outside of both files get the output nodata
+    assert merged[0, 0] == 0
+    assert merged[-1, -1] == 0
+
+
+def test_warp_to_projection_downsample(tmp_path, shifted_slc_files):
+    fn = shifted_slc_files[0]
+    projection = stitching._get_mode_projection([fn])
+    # Same projection and resolution: the file is used as is
+    assert stitching.warp_to_projection([fn], tmp_path, projection) == [fn]
+
+    # A coarser resolution downsamples in the warped VRT
+    (warped,) = stitching.warp_to_projection(
+        [fn], tmp_path, projection, res=(2.0, -2.0)
+    )
+    assert warped != fn
+    gt = io.get_raster_gt(warped)
+    assert (gt[1], gt[5]) == (2.0, -2.0)
+
+
+def test_nodata_to_zero(tmp_path):
+    data = np.random.rand(300, 400).astype(np.float32)
+    data[0, 0] = np.nan
+    data[-1, -1] = -9999
+    infile = tmp_path / "in.tif"
+    gt = [0.0, 1.0, 0.0, 300.0, 0.0, -1.0]
+    io.write_arr(arr=data, output_name=infile, geotransform=gt, nodata=-9999)
+
+    outfile = tmp_path / "out.tif"
+    stitching._nodata_to_zero(infile, outfile=outfile, driver="GTiff")
+    out = io.load_gdal(outfile)
+    assert out[0, 0] == out[-1, -1] == 0
+    np.testing.assert_array_equal(out[1:-1], data[1:-1])
+    assert io.get_raster_gt(outfile) == gt
+    assert io.get_raster_nodata(outfile) == -9999
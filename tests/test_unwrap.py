@@ -75,6 +75,77 @@ def test_unwrap_snaphu_logfile(tmp_path, raster_100_by_200, corr_raster):
     assert Path(logfile_name).exists()
 
 
+@pytest.mark.skipif(
+    sys.platform == "darwin",
+    reason="snaphu doesn't run on mac",
+)
+def test_unwrap_snaphu_tiles(tmp_path, raster_100_by_200, corr_raster):
+    unw_filename = tmp_path / "unwrapped.unw.tif"
+    unwrap.unwrap(
+        ifg_filename=raster_100_by_200,
+        corr_filename=corr_raster,
+        unw_filename=unw_filename,
+        nlooks=1,
+        init_method="mst",
+        ntiles=(2, 2),
+        tile_overlap=(20, 20),
+        n_parallel_tiles=2,
+    )
+    assert io.get_raster_xysize(unw_filename) == io.get_raster_xysize(raster_100_by_200)
+
+
+@pytest.mark.skipif(
+    sys.platform == "darwin",
+    reason="snaphu doesn't run on mac",
+)
+def test_unwrap_failure_removes_zeroed(
+    monkeypatch, tmp_path, raster_100_by_200, corr_raster
+):
+    mask_file = tmp_path / "mask.tif"
+    io.write_arr(
+        arr=np.ones((100, 200), dtype=np.uint8),
+        output_name=mask_file,
+        like_filename=raster_100_by_200,
+    )
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("snaphu failed")
+
+    monkeypatch.setattr(unwrap.snaphu, "unwrap", _fail)
+    unw_filename = tmp_path / "unwrapped.unw.tif"
+    with pytest.raises(RuntimeError, match="snaphu failed"):
+        unwrap.unwrap(
+            ifg_filename=raster_100_by_200,
+            corr_filename=corr_raster,
+            unw_filename=unw_filename,
+            nlooks=1,
+            mask_file=mask_file,
+        )
+    for f in unwrap._get_zeroed_filenames(unw_filename):
+        assert not f.exists()
+
+
+def test_get_auto_ntiles():
+    assert unwrap._get_auto_ntiles((100, 200)) == (1, 1)
+    assert unwrap._get_auto_ntiles((2000, 2001)) == (1, 2)
+    assert unwrap._get_auto_ntiles((100, 200), max_tile_size=60) == (2, 4)
+
+
+def test_unwrap_invalid_ntiles(tmp_path, raster_100_by_200, corr_raster):
+    unw_filename = tmp_path / "unwrapped.unw.tif"
+    with pytest.raises(ValueError, match="ntiles"):
+        unwrap.unwrap(
+            ifg_filename=raster_100_by_200,
+            corr_filename=corr_raster,
+            unw_filename=unw_filename,
+            nlooks=1,
+            ntiles="bad",
+        )
+    # Nothing is left for `run` to mistake for a finished output
+    assert not unw_filename.exists()
+    assert not Path(str(unw_filename).replace(".unw.tif", ".unw.conncomp")).exists()
+
+
 @pytest.fixture
 def list_of_ifgs(tmp_path, raster_100_by_200):
     ifg_list = []
@@ -140,6 +211,64 @@ def test_run_gtiff(list_of_gtiff_ifgs, corr_raster, unw_suffix):
     )
 
 
+@pytest.mark.skipif(
+    sys.platform == "darwin",
+    reason="snaphu doesn't run on mac",
+)
+@pytest.mark.parametrize("n_parallel_tiles, expected_nproc", [(None, 4), (2, 2)])
+def test_run_n_parallel_tiles(
+    monkeypatch,
+    tmp_path,
+    list_of_gtiff_ifgs,
+    corr_raster,
+    n_parallel_tiles,
+    expected_nproc,
+):
+    # One worker on 8 CPUs: by default, the spare CPUs go to the 2x2 tiles
+    monkeypatch.setattr(unwrap, "get_cpu_count", lambda: 8)
+    nprocs = []
+    orig_get_tiling_params = unwrap._get_tiling_params
+
+    def _get_tiling_params(*args):
+        params = orig_get_tiling_params(*args)
+        nprocs.append(params.nproc)
+        return params
+
+    monkeypatch.setattr(unwrap, "_get_tiling_params", _get_tiling_params)
+    unwrap.run(
+        ifg_filenames=list_of_gtiff_ifgs,
+        cor_filenames=[corr_raster] * len(list_of_gtiff_ifgs),
+        output_path=tmp_path,
+        nlooks=1,
+        max_jobs=1,
+        ntiles=(2, 2),
+        tile_overlap=(20, 20),
+        n_parallel_tiles=n_parallel_tiles,
+        overwrite=True,
+    )
+    assert nprocs == [expected_nproc] * len(list_of_gtiff_ifgs)
+
+
+def test_run_all_existing(tmp_path, list_of_gtiff_ifgs, corr_raster):
+    # Outputs that already exist are returned without unwrapping anything
+    existing = [(tmp_path / f.name).with_suffix(".unw.tif") for f in list_of_gtiff_ifgs]
+    for f in existing:
+        f.touch()
+    out_files, conncomp_files = unwrap.run(
+        ifg_filenames=list_of_gtiff_ifgs,
+        cor_filenames=[corr_raster] * len(list_of_gtiff_ifgs),
+        output_path=tmp_path,
+        nlooks=1,
+        unw_suffix=".unw.tif",
+        max_jobs=2,
+    )
+    assert out_files == existing
+    assert conncomp_files == [
+        Path(str(f).replace(".unw.tif", ".unw.conncomp")) for f in existing
+    ]
+    assert not any(f.exists() for f in conncomp_files)
+
+
 @pytest.mark.skipif(os.environ.get("NUMBA_DISABLE_JIT") == "1", reason="JIT disabled")
 def test_compute_phase_diffs():
     # test on a 2D array with no phase jumps > pi
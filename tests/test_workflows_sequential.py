@@ -1,3 +1,4 @@
+import numpy as np
 import numpy.testing as npt
 import pytest
 
@@ -123,3 +124,24 @@ def test_sequential_ministack_sizes(tmp_path, slc_file_list_nc, ministack_size):
         n_workers=4,
         gpu_enabled=False,
     )
+
+
+def test_average_files(tmp_path):
+    data = np.random.rand(3, 20, 30).astype(np.float32)
+    data[0, 0, 0] = np.nan
+    # A nodata pixel in any input is nodata in the output
+    data[1, 5, 5] = 0
+    files = []
+    for idx, arr in enumerate(data):
+        fname = tmp_path / f"tcorr_{idx}.tif"
+        io.write_arr(arr=arr, output_name=fname, nodata=0)
+        files.append(fname)
+
+    out_file = tmp_path / "tcorr_average.tif"
+    sequential._average_files(files, out_file)
+
+    expected = np.nanmean(data, axis=0)
+    expected[5, 5] = 0
+    out = io.load_gdal(out_file)
+    npt.assert_allclose(out, expected, rtol=1e-6)
+    assert io.get_raster_nodata(out_file) == 0